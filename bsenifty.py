@@ -1,49 +1,70 @@
 # bse_nifty_ticker.py
 import time
 import datetime
+import signal
+import threading
 import yfinance as yf
 from RPLCD.i2c import CharLCD
+from smbus2 import SMBus
+from i2c_common import flush_frame, fetch_or_stop
 
 # LCD setup - adjust address/driver if needed
 LCD_DRIVER = 'PCF8574'
 LCD_ADDR = 0x27
 lcd = CharLCD(LCD_DRIVER, LCD_ADDR, port=1, cols=16, rows=2)
 lcd.backlight_enabled = True
+bus = SMBus(1)
 
 # Tickers used by yfinance
 SENSEX_SYMBOL = "^BSESN"
 NIFTY_SYMBOL = "^NSEI"
 
-def fetch_price_and_change(symbol):
+# set on SIGTERM (systemd stop) or by the rotator; the loop waits on it so it exits without polling
+STOP = threading.Event()
+
+def fetch_price_and_change(symbols):
     """
-    Use yfinance history to get the latest price and change vs previous close.
-    Returns (price (float), change (float)) or (None, None) on failure.
+    Use one yfinance download to get the latest price and change vs previous close
+    for every symbol.
+    Returns {symbol: (price (float), change (float))}, with (None, None) on failure.
     """
+    out = {s: (None, None) for s in symbols}
     try:
-        tk = yf.Ticker(symbol)
-        # Get intraday recent prices; many indices update intraday so 1m interval is OK
-        hist = tk.history(period="2d", interval="1m", prepost=False)
-        if hist is None or hist.empty:
+        # Get intraday recent prices for all symbols in one request; 1m interval is OK for indices
+        data = yf.download(symbols, period="2d", interval="1m", prepost=False,
+                           group_by="ticker", threads=True, progress=False)
+        if data is None or data.empty:
             # fallback: try daily resolution (last 5 days)
-            hist = tk.history(period="5d", interval="1d")
-            if hist is None or hist.empty:
-                return None, None
-
-        # Latest close price (last available)
-        latest_price = float(hist['Close'].iloc[-1])
-        # previous close: try previous row, else use info
-        if len(hist['Close']) >= 2:
-            prev = float(hist['Close'].iloc[-2])
-        else:
-            info = tk.info
-            prev = info.get('previousClose') or latest_price
-
-        change = latest_price - prev
-        return latest_price, change
+            data = yf.download(symbols, period="5d", interval="1d",
+                               group_by="ticker", threads=True, progress=False)
+            if data is None or data.empty:
+                return out
     except Exception as e:
         # don't crash; return None to let main loop display error
-        print(f"fetch error for {symbol}: {e}")
-        return None, None
+        print(f"fetch error for {symbols}: {e}")
+        return out
+
+    for symbol in symbols:
+        try:
+            # rows are the union of both tickers' timestamps, so drop the other's gaps
+            closes = data[(symbol, 'Close')].dropna()
+            if closes.empty:
+                continue
+            # Latest close price (last available)
+            latest_price = float(closes.iloc[-1])
+            # previous close: try previous row, else the lightweight fast_info quote
+            # (Ticker.info scrapes the whole summary page and can take seconds)
+            if len(closes) >= 2:
+                prev = float(closes.iloc[-2])
+            else:
+                try:
+                    prev = float(yf.Ticker(symbol).fast_info['previous_close'])
+                except Exception:
+                    prev = latest_price
+            out[symbol] = (latest_price, latest_price - prev)
+        except Exception as e:
+            print(f"fetch error for {symbol}: {e}")
+    return out
 
 def format_line(name, price, change):
     if price is None:
@@ -71,49 +92,77 @@ def scroll_line(line_text, row=0, delay=0.35):
         lcd.write_string(scroll_text[i:i+16])
         time.sleep(delay)
 
-def main_loop():
+def scroll_buffer(text, span):
+    """Lay a line out once per fetch so each of `span` scroll frames is a single slice."""
+    if len(text) <= 16:
+        return text.ljust(16)
+    loop = text + "   "
+    return (loop * (1 + (span + 16) // len(loop)))[:span + 16]
+
+def main_loop(stop=STOP):
     # We will fetch every 60 seconds (adjust as needed). Between fetches we scroll.
     FETCH_INTERVAL = 60
-    last_fetch = 0
+    SCROLL_DELAY = 0.25
+    last_fetch = float("-inf")
     sensex_text = "SENSEX N/A"
     nifty_text = "NIFTY N/A"
+    lcd_rows = [None, None]
 
     try:
-        while True:
-            now = time.time()
-            if now - last_fetch > FETCH_INTERVAL:
+        while not stop.is_set():
+            now = time.monotonic()
+            if now - last_fetch >= FETCH_INTERVAL:
                 # fetch fresh values
-                sx_price, sx_change = fetch_price_and_change(SENSEX_SYMBOL)
-                nf_price, nf_change = fetch_price_and_change(NIFTY_SYMBOL)
+                quotes = fetch_or_stop(stop, fetch_price_and_change, [SENSEX_SYMBOL, NIFTY_SYMBOL])
+                if quotes is None:   # stopped mid-fetch
+                    break
+                sx_price, sx_change = quotes[SENSEX_SYMBOL]
+                nf_price, nf_change = quotes[NIFTY_SYMBOL]
 
                 sensex_text = format_line("SENSEX", sx_price, sx_change) if sx_price is not None else "SENSEX ERR"
                 nifty_text  = format_line("NIFTY", nf_price, nf_change)   if nf_price is not None else "NIFTY ERR"
 
                 # include timestamp on console for debugging
                 print(f"[{datetime.datetime.now().isoformat()}] {sensex_text} | {nifty_text}")
+                # Build a combined scroll length = max len of lines + gap
+                maxlen = max(len(sensex_text), len(nifty_text)) + 3
+                top_buf, bot_buf = scroll_buffer(sensex_text, maxlen), scroll_buffer(nifty_text, maxlen)
                 last_fetch = now
 
+            fetch_due = last_fetch + FETCH_INTERVAL
+
+            # Nothing to scroll: show both lines once and sleep until the next fetch.
+            if len(sensex_text) <= 16 and len(nifty_text) <= 16:
+                flush_frame(bus, LCD_ADDR, top_buf, bot_buf, lcd_rows)
+                stop.wait(max(0.0, fetch_due - time.monotonic()))
+                continue
+
             # Scroll both lines in small steps. This inner loop provides smoother animation between fetches.
             # We will iterate a bit and then check if it's time to fetch again.
-            # Build a combined scroll length = max len of lines + gap
-            maxlen = max(len(sensex_text), len(nifty_text)) + 3
+            next_tick = time.monotonic()
             for shift in range(maxlen):
-                # show window for the top line
-                top_window = (sensex_text + "   ")[shift:shift+16] if len(sensex_text) > 16 else sensex_text.ljust(16)
-                bot_window = (nifty_text  + "   ")[shift:shift+16] if len(nifty_text)  > 16 else nifty_text.ljust(16)
-                lcd.cursor_pos = (0, 0); lcd.write_string(top_window)
-                lcd.cursor_pos = (1, 0); lcd.write_string(bot_window)
-                time.sleep(0.25)
-
-                # break early if it's time to fetch new data
-                if time.time() - last_fetch > FETCH_INTERVAL:
+                # one slice per line; lines that fit were padded to exactly 16 and stay put
+                top_window = top_buf[shift:shift+16] if len(top_buf) > 16 else top_buf
+                bot_window = bot_buf[shift:shift+16] if len(bot_buf) > 16 else bot_buf
+                flush_frame(bus, LCD_ADDR, top_window, bot_window, lcd_rows)
+
+                # sleep to the next step on a fixed schedule, waking early if a fetch falls due
+                next_tick += SCROLL_DELAY
+                if stop.wait(max(0.0, min(next_tick, fetch_due) - time.monotonic())) \
+                        or time.monotonic() >= fetch_due:
                     break
 
     except KeyboardInterrupt:
+        # Ctrl-C only: a stop through the event (SIGTERM or the rotator) leaves the last frame up
         lcd.clear()
         lcd.write_string("Ticker stopped")
         lcd.backlight_enabled = True
         print("Stopped by user")
 
+def run(stop_event):
+    """In-process entry point for i2c_rotator.py: show the ticker until stop_event is set."""
+    main_loop(stop_event)
+
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, lambda *_: STOP.set())
     main_loop()
@@ -9,9 +9,17 @@ crypto_lcd_btc_scroll_star.py
 """
 
 import time
-import requests
-from datetime import datetime
+import signal
+import threading
+from functools import lru_cache
 from RPLCD.i2c import CharLCD
+from smbus2 import SMBus, i2c_msg
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+from i2c_common import (PCF_RS, lcd_nibbles, flush_frame, build_windows, scroll_window,
+                        shared_get, shared_set, http_session, json_loads, fetch_or_stop)
 
 # ---------- CONFIG ----------
 LCD_DRIVER = 'PCF8574'
@@ -22,6 +30,10 @@ UPDATE_INTERVAL = 30          # seconds between CoinGecko fetches
 COINGECKO_URL = ("https://api.coingecko.com/api/v3/simple/price"
                  "?ids=bitcoin,ethereum&vs_currencies=usd"
                  "&include_24hr_change=true")
+HTTP_CACHE = "/tmp/i2c_http_cache"   # sqlite response cache shared by tickers
+CACHE_TTL = 25                # seconds a cached CoinGecko response counts as fresh
+SHARED_TTL = 600              # last good prices kept in Redis for restarts during outages
+SHARED_KEYS = ("crypto:btc_usd", "crypto:btc_chg", "crypto:eth_usd", "crypto:eth_chg")
 
 # Scrolling params for BTC row
 STATIC_DISPLAY = 5.0          # seconds to show leftmost BTC text before scrolling
@@ -36,6 +48,7 @@ VERBOSE = False
 # ---------- LCD setup ----------
 lcd = CharLCD(LCD_DRIVER, LCD_ADDR, port=I2C_PORT, cols=16, rows=2)
 lcd.backlight_enabled = True
+bus = SMBus(I2C_PORT)
 
 # custom chars for up/down arrows
 UP = (
@@ -58,20 +71,26 @@ DOWN = (
     0b00100,
     0b00000,
 )
-try:
-    lcd.create_char(0, UP)
-    lcd.create_char(1, DOWN)
-except Exception:
-    pass
 
 # ---------- helpers ----------
+# keep-alive session; failed connects/reads are retried 3 times with backoff.
+# With requests_cache installed it is backed by a disk cache: fresh hits skip the network,
+# and an expired copy is served (flagged is_expired) if the API is unreachable.
+CACHE = (requests_cache.CachedSession(HTTP_CACHE, backend="sqlite", expire_after=CACHE_TTL,
+                                      stale_if_error=True) if requests_cache else None)
+SESSION = http_session(CACHE)
+
+# set on SIGTERM (systemd stop) or by the rotator; the loop waits on it so it exits without polling
+STOP = threading.Event()
+
 def fetch_prices():
+    """Return (data, error, stale): stale means the response cache served an expired copy."""
     try:
-        r = requests.get(COINGECKO_URL, timeout=10)
+        r = SESSION.get(COINGECKO_URL, timeout=10)
         r.raise_for_status()
-        return r.json(), None
+        return json_loads(r.content), None, getattr(r, "is_expired", False)
     except Exception as e:
-        return None, str(e)
+        return None, str(e), False
 
 def fmt_price_full(num):
     if num is None:
@@ -92,6 +111,8 @@ def fmt_change(pct):
     arrow = "\x00" if p >= 0 else "\x01"
     return arrow, f"{sign}{p:.1f}%"
 
+# prices change once per fetch, so these are memoized on their (hashable) inputs
+@lru_cache(maxsize=4)
 def build_btc_full(price_raw, change_raw):
     price = fmt_price_full(price_raw)
     arrow, pct = fmt_change(change_raw)
@@ -99,7 +120,8 @@ def build_btc_full(price_raw, change_raw):
         return f"BTC:{price} {arrow}{pct}"
     return f"BTC:{price}"
 
-def build_eth_line(price_raw, change_raw, show_star=False):
+@lru_cache(maxsize=4)
+def build_eth_line(price_raw, change_raw, mark=""):
     price = fmt_price_full(price_raw)
     arrow, pct = fmt_change(change_raw)
     base = f"ETH:{price}"
@@ -115,31 +137,36 @@ def build_eth_line(price_raw, change_raw, show_star=False):
     # pad/truncate to 16
     s = s[:16].ljust(16)
 
-    # if update marker, replace last char with '*'
-    if show_star:
-        s = s[:15] + "*"
+    # '*' just after an update, 'C' while showing cached prices: replaces the last char
+    if mark:
+        s = s[:15] + mark
     return s
 
-def scroll_window(full_s, base_time, now_ts):
-    COLS = 16
-    if len(full_s) <= COLS:
-        return full_s.ljust(COLS)
+# precomputed scroll windows, rebuilt only when the scrolled text changes
+_window_cache = {}
 
-    static_until = base_time + STATIC_DISPLAY
-    if now_ts < static_until:
-        return full_s[:COLS].ljust(COLS)
-
-    scroll = full_s + SCROLL_GAP
-    total_len = len(scroll)
-    elapsed = now_ts - static_until
-    step = int(elapsed / SCROLL_STEP)
-    pos = step % total_len
-    wrapped = scroll + scroll
-    return wrapped[pos:pos + COLS]
+def load_custom_chars():
+    """Write the UP/DOWN arrows to CGRAM 0/1 in one I2C burst. Called at the start of every run:
+    other scripts in the rotation (tempi2ctrend) redefine the same CGRAM slots."""
+    buf = bytearray(lcd_nibbles(0x40))          # SET CGRAM ADDR 0; the address auto-increments
+    for row in UP + DOWN:
+        buf.extend(lcd_nibbles(row, PCF_RS))
+    buf.extend(lcd_nibbles(0x80))               # back to DDRAM so later text lands on screen
+    try:
+        bus.i2c_rdwr(i2c_msg.write(LCD_ADDR, buf))
+    except Exception as e:
+        if VERBOSE:
+            print("CGRAM burst failed, using create_char:", e)
+        try:
+            lcd.create_char(0, UP)
+            lcd.create_char(1, DOWN)
+        except Exception as e:
+            if VERBOSE:
+                print("create_char failed:", e)
 
 # ---------- main ----------
-def main():
-    last_fetch = 0.0
+def main(stop=STOP):
+    last_fetch = float("-inf")
     btc_full_last = ""
     scroll_base_time = 0.0
 
@@ -147,22 +174,39 @@ def main():
     btc_change = None
     eth_price = None
     eth_change = None
+    stale = False   # prices on screen came from an expired cached response or Redis
 
     last_update_time = None
+    lcd_rows = [None, None]
+    load_custom_chars()
 
     try:
-        while True:
-            now = time.time()
+        while not stop.is_set():
+            now = time.monotonic()
             # fetch when due
             if now - last_fetch >= UPDATE_INTERVAL:
-                data, err = fetch_prices()
+                res = fetch_or_stop(stop, fetch_prices)
+                if res is None:   # stopped mid-fetch
+                    break
+                data, err, stale = res
+                if err and btc_price is None:
+                    # nothing on screen yet (e.g. fresh start during an outage): use the shared copy
+                    vals = shared_get(*SHARED_KEYS)
+                    if vals[0] is not None:
+                        vals = [float(v) if v is not None else None for v in vals]
+                        data, err = {"bitcoin": {"usd": vals[0], "usd_24h_change": vals[1]},
+                                     "ethereum": {"usd": vals[2], "usd_24h_change": vals[3]}}, None
+                        stale = True
                 if err:
                     if VERBOSE:
                         print("Fetch error:", err)
-                    lcd.cursor_pos = (0, 0); lcd.write_string("BTC: ERR".ljust(16))
-                    lcd.cursor_pos = (1, 0); lcd.write_string("ETH: ERR".ljust(16))
+                    try:
+                        flush_frame(bus, LCD_ADDR, "BTC: ERR".ljust(16), "ETH: ERR".ljust(16), lcd_rows)
+                    except Exception:
+                        lcd_rows[:] = [None, None]
                     last_fetch = now
-                    time.sleep(1.0)
+                    stale = True   # whatever prices show after the ERR frame are the old ones
+                    stop.wait(1.0)
                     continue
 
                 btc = data.get("bitcoin", {})
@@ -175,46 +219,59 @@ def main():
                 btc_full = build_btc_full(btc_price, btc_change)
                 if btc_full != btc_full_last:
                     btc_full_last = btc_full
+                    _window_cache["btc"] = build_windows(btc_full, 16, SCROLL_GAP)
                     scroll_base_time = now
                     if VERBOSE:
                         print("BTC changed, reset scroll base:", btc_full)
 
-                last_update_time = datetime.now()
+                if not stale:   # old prices get no update marker and are not republished
+                    last_update_time = now
+                    shared_set(dict(zip(SHARED_KEYS, (btc_price, btc_change, eth_price, eth_change))),
+                               SHARED_TTL)
                 last_fetch = now
 
             # BTC row (scrolling)
             if btc_price is None:
-                btc_display = "BTC: ERR".ljust(16)
+                btc_display, next_scroll = "BTC: ERR".ljust(16), float("inf")
             else:
-                btc_display = scroll_window(build_btc_full(btc_price, btc_change),
-                                            scroll_base_time, time.time())
+                btc_display, next_scroll = scroll_window(_window_cache["btc"], scroll_base_time,
+                                                         time.monotonic(), STATIC_DISPLAY, SCROLL_STEP)
 
-            # ETH row with update marker
-            show_star = False
-            if last_update_time:
-                elapsed = (datetime.now() - last_update_time).total_seconds()
-                if elapsed <= UPDATED_DISPLAY_SECONDS:
-                    show_star = True
-            eth_display = build_eth_line(eth_price, eth_change, show_star)
+            # ETH row with update marker, or 'C' while the prices are cached
+            mark = "C" if stale else ""
+            star_expiry = float("inf")
+            if not stale and last_update_time is not None:
+                # monotonic seconds: a float compare, and immune to wall-clock jumps
+                if time.monotonic() - last_update_time <= UPDATED_DISPLAY_SECONDS:
+                    mark = "*"
+                    star_expiry = last_update_time + UPDATED_DISPLAY_SECONDS
+            eth_display = build_eth_line(eth_price, eth_change, mark)
 
             # update LCD
             try:
-                lcd.cursor_pos = (0, 0); lcd.write_string(btc_display)
-                lcd.cursor_pos = (1, 0); lcd.write_string(eth_display)
+                flush_frame(bus, LCD_ADDR, btc_display, eth_display, lcd_rows)
             except Exception:
+                lcd_rows[:] = [None, None]
                 try:
                     lcd.clear()
-                    lcd.cursor_pos = (0, 0); lcd.write_string(btc_display)
-                    lcd.cursor_pos = (1, 0); lcd.write_string(eth_display)
+                    flush_frame(bus, LCD_ADDR, btc_display, eth_display, lcd_rows)
                 except Exception:
                     pass
 
-            time.sleep(0.12)
+            # sleep until the next fetch, scroll step or star expiry
+            next_wake = min(last_fetch + UPDATE_INTERVAL, next_scroll, star_expiry)
+            stop.wait(max(0.0, next_wake - time.monotonic()))
 
     except KeyboardInterrupt:
+        # Ctrl-C only: a stop through the event (SIGTERM or the rotator) leaves the last frame up
         lcd.clear()
         lcd.write_string("Stopped")
         lcd.backlight_enabled = True
 
+def run(stop_event):
+    """In-process entry point for i2c_rotator.py: show the ticker until stop_event is set."""
+    main(stop_event)
+
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, lambda *_: STOP.set())
     main()
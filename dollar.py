@@ -6,45 +6,50 @@ AED->INR computed as INR_per_USD / AED_per_USD.
 Retries + cache fallback.
 """
 
-import time, requests, json, os
-from datetime import datetime
+import signal, threading
 from RPLCD.i2c import CharLCD
+from smbus2 import SMBus
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+from i2c_common import (flush_frame, shared_get, shared_set, http_session, json_loads,
+                        fetch_or_stop)
 
 LCD_DRIVER='PCF8574'; LCD_ADDR=0x27; I2C_PORT=1; COLS=16
 UPDATE_INTERVAL = 300
 EXCHANGE_ENDPOINT = "https://open.er-api.com/v6/latest/USD"
-CACHE_FILE = "/tmp/currency_cache.json"
+HTTP_CACHE = "/tmp/i2c_http_cache"   # sqlite response cache shared by the ticker scripts
+CACHE_TTL = 290                      # seconds a cached rates response counts as fresh
+SHARED_TTL = 1800                    # last good rates kept in Redis for other scripts/restarts
 RETRIES = 3; TIMEOUT = 8
 
 lcd = CharLCD(LCD_DRIVER, LCD_ADDR, port=I2C_PORT, cols=COLS, rows=2)
 lcd.backlight_enabled = True
+bus = SMBus(I2C_PORT)
 
-def save_cache(d):
-    try:
-        with open(CACHE_FILE, "w") as f:
-            json.dump(d, f)
-    except Exception:
-        pass
+# keep-alive session; failed connects/reads are retried RETRIES times with backoff.
+# With requests_cache installed it is backed by a disk cache: fresh hits skip the network,
+# and an expired copy is served (flagged is_expired) if the API is unreachable.
+CACHE = (requests_cache.CachedSession(HTTP_CACHE, backend="sqlite", expire_after=CACHE_TTL,
+                                      stale_if_error=True) if requests_cache else None)
+SESSION = http_session(CACHE, retries=RETRIES)
 
-def load_cache():
-    try:
-        with open(CACHE_FILE, "r") as f:
-            return json.load(f)
-    except Exception:
-        return None
+# set on SIGTERM (systemd stop) or by the rotator; the loop waits on it so it exits without polling
+STOP = threading.Event()
 
 def fetch_rates():
-    for _ in range(RETRIES):
-        try:
-            r = requests.get(EXCHANGE_ENDPOINT, timeout=TIMEOUT)
-            r.raise_for_status()
-            j = r.json()
-            rates = j.get("rates") or j.get("conversion_rates") or None
-            if isinstance(rates, dict):
-                return rates
-        except Exception:
-            time.sleep(1)
-    return None
+    """Return (rates, stale): rates dict or None, and whether it is an expired cached copy."""
+    try:
+        r = SESSION.get(EXCHANGE_ENDPOINT, timeout=TIMEOUT)
+        r.raise_for_status()
+        j = json_loads(r.content)
+        rates = j.get("rates") or j.get("conversion_rates") or None
+        if isinstance(rates, dict):
+            return rates, getattr(r, "is_expired", False)
+    except Exception:
+        pass
+    return None, False
 
 def fmt_money(x):
     if x is None:
@@ -70,12 +75,14 @@ def build_line(label, val, cached=False):
             s = s[:COLS-1] + " " + "C"
     return s[:COLS].ljust(COLS)
 
-def main():
-    cache = load_cache() or {}
+def main(stop=STOP):
+    lcd_rows = [None, None]
     try:
-        while True:
-            rates = fetch_rates()
-            used_cache = False
+        while not stop.is_set():
+            res = fetch_or_stop(stop, fetch_rates)
+            if res is None:   # stopped mid-fetch
+                break
+            rates, used_cache = res
             usd_inr = aed_inr = None
             if rates:
                 inr_per_usd = rates.get("INR")
@@ -85,32 +92,37 @@ def main():
                     usd_inr = float(inr_per_usd)
                     if usd_per_aed is not None and float(usd_per_aed) != 0:
                         aed_inr = float(inr_per_usd) / float(usd_per_aed)
-                # save cache if both present
-                cache = {"usd_inr": usd_inr, "aed_inr": aed_inr, "updated": datetime.now().isoformat()}
-                save_cache(cache)
+                if not used_cache:   # an expired cached copy must not renew the shared TTL
+                    shared_set({"dollar:usd_inr": usd_inr, "dollar:aed_inr": aed_inr}, SHARED_TTL)
             else:
-                if cache:
-                    usd_inr = cache.get("usd_inr")
-                    aed_inr = cache.get("aed_inr")
-                    used_cache = True
+                # no response at all (not even a stale one); fall back to the shared copy
+                usd_s, aed_s = shared_get("dollar:usd_inr", "dollar:aed_inr")
+                usd_inr = float(usd_s) if usd_s else None
+                aed_inr = float(aed_s) if aed_s else None
+                used_cache = usd_inr is not None
 
             line1 = build_line("USD", usd_inr, cached=used_cache)
             line2 = build_line("AED", aed_inr, cached=used_cache)
 
             try:
-                lcd.cursor_pos=(0,0); lcd.write_string(line1)
-                lcd.cursor_pos=(1,0); lcd.write_string(line2)
+                flush_frame(bus, LCD_ADDR, line1, line2, lcd_rows)
             except Exception:
+                lcd_rows[:] = [None, None]
                 try:
                     lcd.clear()
-                    lcd.cursor_pos=(0,0); lcd.write_string(line1)
-                    lcd.cursor_pos=(1,0); lcd.write_string(line2)
+                    flush_frame(bus, LCD_ADDR, line1, line2, lcd_rows)
                 except Exception:
                     pass
 
-            time.sleep(UPDATE_INTERVAL)
+            stop.wait(UPDATE_INTERVAL)
     except KeyboardInterrupt:
+        # Ctrl-C only: a stop through the event (SIGTERM or the rotator) leaves the last frame up
         lcd.clear(); lcd.write_string("Stopped".ljust(COLS)); lcd.backlight_enabled=True
 
+def run(stop_event):
+    """In-process entry point for i2c_rotator.py: show the ticker until stop_event is set."""
+    main(stop_event)
+
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, lambda *_: STOP.set())
     main()
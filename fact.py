@@ -2,78 +2,96 @@
 # i2c_fact.py
 # Fetch a random fact and display on 16x2 LCD. Top: FACT, Bottom: scrolling fact.
 
-import time, requests
+import time, signal, threading
 from RPLCD.i2c import CharLCD
+from smbus2 import SMBus
+from i2c_common import (flush_frame, build_windows, scroll_window, shared_get,
+                        shared_set, http_session, json_loads, fetch_or_stop)
 
 LCD_DRIVER='PCF8574'; LCD_ADDR=0x27; I2C_PORT=1; COLS=16
 UPDATE_INTERVAL=90
 STATIC_DISPLAY=2.5
 SCROLL_STEP=0.15
 SCROLL_GAP="    "
+SHARED_TTL=24*3600   # keep the last fact in Redis for a day
 
 FACT_API = "https://uselessfacts.jsph.pl/random.json?language=en"
 
 lcd = CharLCD(LCD_DRIVER, LCD_ADDR, port=I2C_PORT, cols=COLS, rows=2)
 lcd.backlight_enabled = True
+bus = SMBus(I2C_PORT)
+
+# keep-alive session; failed connects/reads are retried 3 times with backoff
+SESSION = http_session()
+
+# set on SIGTERM (systemd stop) or by the rotator; the loop waits on it so it exits without polling
+STOP = threading.Event()
 
 def fetch_fact():
     try:
-        r = requests.get(FACT_API, timeout=8)
+        r = SESSION.get(FACT_API, timeout=8)
         r.raise_for_status()
-        j = r.json()
+        j = json_loads(r.content)
         return j.get("text")
     except Exception:
         return None
 
-def scroll_window(full_s, base_time, now_ts):
-    if not full_s:
-        return "".ljust(COLS)
-    if len(full_s) <= COLS:
-        return full_s.ljust(COLS)
-    static_until = base_time + STATIC_DISPLAY
-    if now_ts < static_until:
-        return full_s[:COLS].ljust(COLS)
-    scroll = full_s + SCROLL_GAP; total = len(scroll)
-    elapsed = now_ts - static_until
-    step = int(elapsed / SCROLL_STEP)
-    pos = step % total
-    wrapped = scroll + scroll
-    return wrapped[pos:pos+COLS]
+# precomputed scroll windows, rebuilt only when the scrolled text changes
+_window_cache = {}
 
-def main():
+def main(stop=STOP):
     last_fetch = 0
     fact = None
     base_time = 0
+    lcd_rows = [None, None]
+    # paint the last shared fact straight away so a restart is not blank during the first fetch
+    cached = shared_get("fact:last")[0]
+    if cached:
+        try:
+            flush_frame(bus, LCD_ADDR, "FACT".center(COLS), build_windows(cached, COLS, SCROLL_GAP)[0], lcd_rows)
+        except Exception:
+            lcd_rows[:] = [None, None]
     try:
-        while True:
-            now = time.time()
+        while not stop.is_set():
+            now = time.monotonic()
             if now - last_fetch >= UPDATE_INTERVAL or fact is None:
-                f = fetch_fact()
+                f = fetch_or_stop(stop, fetch_fact)
+                if stop.is_set():   # stopped mid-fetch (f is None for a failed fetch too)
+                    break
                 if f:
                     fact = f
+                    shared_set({"fact:last": f}, SHARED_TTL)
                     base_time = now
                 else:
-                    fact = "No fact available."
+                    fact = shared_get("fact:last")[0] or "No fact available."
                     base_time = now
+                _window_cache["fact"] = build_windows(fact, COLS, SCROLL_GAP)
                 last_fetch = now
 
             top = "FACT".center(COLS)
-            bottom = scroll_window(fact, base_time, time.time())
+            bottom, next_scroll = scroll_window(_window_cache["fact"], base_time, time.monotonic(),
+                                                STATIC_DISPLAY, SCROLL_STEP)
 
             try:
-                lcd.cursor_pos=(0,0); lcd.write_string(top)
-                lcd.cursor_pos=(1,0); lcd.write_string(bottom)
+                flush_frame(bus, LCD_ADDR, top, bottom, lcd_rows)
             except Exception:
+                lcd_rows[:] = [None, None]
                 try:
                     lcd.clear()
-                    lcd.cursor_pos=(0,0); lcd.write_string(top)
-                    lcd.cursor_pos=(1,0); lcd.write_string(bottom)
+                    flush_frame(bus, LCD_ADDR, top, bottom, lcd_rows)
                 except Exception:
                     pass
 
-            time.sleep(0.12)
+            next_wake = min(last_fetch + UPDATE_INTERVAL, next_scroll)
+            stop.wait(max(0.0, next_wake - time.monotonic()))
     except KeyboardInterrupt:
+        # Ctrl-C only: a stop through the event (SIGTERM or the rotator) leaves the last frame up
         lcd.clear(); lcd.write_string("Stopped"); lcd.backlight_enabled=True
 
+def run(stop_event):
+    """In-process entry point for i2c_rotator.py: show the fact screen until stop_event is set."""
+    main(stop_event)
+
 if __name__=='__main__':
+    signal.signal(signal.SIGTERM, lambda *_: STOP.set())
     main()
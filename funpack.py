@@ -9,8 +9,13 @@ Fun Pack for 16x2 I2C LCD:
  - Persistent rotating word queue (no repeats until list exhausted)
 """
 
-import time, random, requests, os
+import time, random, os, signal, threading
+from bisect import bisect
+from itertools import accumulate
 from RPLCD.i2c import CharLCD
+from smbus2 import SMBus
+from i2c_common import (flush_frame, build_windows, scroll_window, shared_get,
+                        shared_set, http_session, json_loads, fetch_or_stop)
 
 # ---------- CONFIG ----------
 LCD_DRIVER = 'PCF8574'
@@ -22,6 +27,7 @@ UPDATE_INTERVAL = 30
 STATIC_DISPLAY = 2.0
 SCROLL_STEP = 0.15
 SCROLL_GAP = "    "
+SHARED_TTL = 24 * 3600   # last fact is shared with fact.py via Redis for a day
 
 LAST_CHOICE_FILE = "/tmp/i2c_funpack_last.txt"
 WORD_INDEX_FILE  = "/tmp/i2c_funpack_words_index.txt"
@@ -42,6 +48,9 @@ FALLBACK_WORDS = [
     "resonance","seraphic","equanimity","halcyon","tranquility","luminescent","poignant","sagacity","venerate",
     "zen","kindred","ardent","ebullient","altruism"
 ]
+# the list above repeats a few words; dedupe so a shuffle really has no repeats until exhausted
+FALLBACK_WORDS = list(dict.fromkeys(FALLBACK_WORDS))
+FALLBACK_SET = frozenset(FALLBACK_WORDS)
 
 JOKE_API = "https://official-joke-api.appspot.com/random_joke"
 FACT_API = "https://uselessfacts.jsph.pl/random.json?language=en"
@@ -50,6 +59,13 @@ WORDNIK_KEY = os.environ.get("WORDNIK_KEY")
 
 lcd = CharLCD(LCD_DRIVER, LCD_ADDR, port=I2C_PORT, cols=COLS, rows=2)
 lcd.backlight_enabled = True
+bus = SMBus(I2C_PORT)
+
+# keep-alive session shared by every content source; failed connects/reads are retried 3 times with backoff
+SESSION = http_session()
+
+# set on SIGTERM (systemd stop) or by the rotator; the loop waits on it so it exits without polling
+STOP = threading.Event()
 
 # ---------- persistence ----------
 def read_last_choice():
@@ -72,7 +88,7 @@ def read_word_index():
             parts = f.read().strip().splitlines()
             order = parts[0].split(",")
             idx = int(parts[1])
-            if set(order) != set(FALLBACK_WORDS):
+            if len(order) != len(FALLBACK_WORDS) or set(order) != FALLBACK_SET:
                 raise ValueError
             return order, idx
     except Exception:
@@ -103,9 +119,9 @@ def get_next_fallback_word():
 # ---------- fetchers ----------
 def fetch_joke():
     try:
-        r = requests.get(JOKE_API, timeout=8)
+        r = SESSION.get(JOKE_API, timeout=8)
         r.raise_for_status()
-        j = r.json()
+        j = json_loads(r.content)
         setup = j.get("setup","").strip()
         punch = j.get("punchline","").strip()
         if setup and punch:
@@ -115,26 +131,29 @@ def fetch_joke():
 
 def fetch_fact():
     try:
-        r = requests.get(FACT_API, timeout=8)
+        r = SESSION.get(FACT_API, timeout=8)
         r.raise_for_status()
-        j = r.json()
+        j = json_loads(r.content)
         txt = j.get("text") or j.get("fact")
-        return txt.strip() if txt else None
+        if not txt:
+            return None
+        shared_set({"fact:last": txt.strip()}, SHARED_TTL)
+        return txt.strip()
     except Exception:
         return None
 
 def fetch_word_and_definition():
     if WORDNIK_KEY:
         try:
-            r = requests.get("https://api.wordnik.com/v4/words.json/randomWord",
-                             params={"api_key": WORDNIK_KEY}, timeout=8)
+            r = SESSION.get("https://api.wordnik.com/v4/words.json/randomWord",
+                            params={"api_key": WORDNIK_KEY}, timeout=8)
             r.raise_for_status()
-            word = r.json().get("word")
+            word = json_loads(r.content).get("word")
             if word:
-                defr = requests.get(f"https://api.wordnik.com/v4/word.json/{word}/definitions",
-                                    params={"limit":1,"api_key":WORDNIK_KEY}, timeout=8)
+                defr = SESSION.get(f"https://api.wordnik.com/v4/word.json/{word}/definitions",
+                                   params={"limit":1,"api_key":WORDNIK_KEY}, timeout=8)
                 defr.raise_for_status()
-                defs = defr.json()
+                defs = json_loads(defr.content)
                 if defs and isinstance(defs, list):
                     definition = defs[0].get("text")
                     return word, definition or "Definition not available."
@@ -144,9 +163,9 @@ def fetch_word_and_definition():
     word = get_next_fallback_word()
     definition = None
     try:
-        r = requests.get(DICTAPI.format(word), timeout=8)
+        r = SESSION.get(DICTAPI.format(word), timeout=8)
         r.raise_for_status()
-        jr = r.json()
+        jr = json_loads(r.content)
         if isinstance(jr, list) and jr:
             meanings = jr[0].get("meanings", [])
             if meanings:
@@ -160,32 +179,21 @@ def fetch_word_and_definition():
     return word, definition
 
 # ---------- random weighting ----------
+def _cdf_table(exclude):
+    cats = [cat for cat in CATEGORY_WEIGHTS if cat != exclude]
+    return cats, list(accumulate(CATEGORY_WEIGHTS[cat] for cat in cats))
+
+# cumulative weights per possible `exclude`, built once so a pick is one bisect
+_CDF_TABLES = {ex: _cdf_table(ex) for ex in (None, *CATEGORY_WEIGHTS)}
+
 def weighted_choice(exclude=None):
-    items = [(cat, w) for cat, w in CATEGORY_WEIGHTS.items() if cat != exclude]
-    total = sum(w for _, w in items)
-    r = random.random() * total
-    upto = 0
-    for cat, w in items:
-        if upto + w >= r:
-            return cat
-        upto += w
-    return items[-1][0]
+    cats, cdf = _CDF_TABLES.get(exclude) or _CDF_TABLES[None]
+    i = bisect(cdf, random.random() * cdf[-1])
+    return cats[min(i, len(cats) - 1)]
 
 # ---------- scrolling ----------
-def scroll_window(full_s, base_time, now_ts):
-    if not full_s:
-        return "".ljust(COLS)
-    if len(full_s) <= COLS:
-        return full_s.ljust(COLS)
-    static_until = base_time + STATIC_DISPLAY
-    if now_ts < static_until:
-        return full_s[:COLS].ljust(COLS)
-    scroll = full_s + SCROLL_GAP
-    total = len(scroll)
-    elapsed = now_ts - static_until
-    step = int(elapsed / SCROLL_STEP)
-    pos = step % total
-    return (scroll + scroll)[pos:pos+COLS]
+# precomputed scroll windows, rebuilt only when the scrolled text changes
+_window_cache = {}
 
 # ---------- main selection ----------
 def choose_and_fetch():
@@ -198,7 +206,7 @@ def choose_and_fetch():
         if w:
             return w.upper(), d
         f = fetch_fact()
-        return "FACT", f or "No fact available."
+        return "FACT", f or shared_get("fact:last")[0] or "No fact available."
     elif choice == "fact":
         f = fetch_fact()
         if f:
@@ -210,36 +218,48 @@ def choose_and_fetch():
         if j:
             return "JOKE", j
         f = fetch_fact()
-        return "FACT", f or "No fact available."
+        return "FACT", f or shared_get("fact:last")[0] or "No fact available."
 
 # ---------- main loop ----------
-def main():
-    last_fetch = 0
+def main(stop=STOP):
+    last_fetch = float("-inf")
     header, content = "FUN", "Loading..."
     base_time = 0.0
+    lcd_rows = [None, None]
     try:
-        while True:
-            now = time.time()
+        while not stop.is_set():
+            now = time.monotonic()
             if now - last_fetch >= UPDATE_INTERVAL:
-                header, content = choose_and_fetch()
+                res = fetch_or_stop(stop, choose_and_fetch)
+                if res is None:   # stopped mid-fetch
+                    break
+                header, content = res
+                _window_cache["content"] = build_windows(content, COLS, SCROLL_GAP)
                 base_time = now
                 last_fetch = now
             top = header.center(COLS)[:COLS].ljust(COLS)
-            bottom = scroll_window(content, base_time, now)
+            bottom, next_scroll = scroll_window(_window_cache["content"], base_time, now,
+                                                STATIC_DISPLAY, SCROLL_STEP)
             try:
-                lcd.cursor_pos = (0,0); lcd.write_string(top)
-                lcd.cursor_pos = (1,0); lcd.write_string(bottom)
+                flush_frame(bus, LCD_ADDR, top, bottom, lcd_rows)
             except Exception:
+                lcd_rows[:] = [None, None]
                 try:
                     lcd.clear()
-                    lcd.cursor_pos = (0,0); lcd.write_string(top)
-                    lcd.cursor_pos = (1,0); lcd.write_string(bottom)
+                    flush_frame(bus, LCD_ADDR, top, bottom, lcd_rows)
                 except Exception:
                     pass
-            time.sleep(0.12)
+            next_wake = min(last_fetch + UPDATE_INTERVAL, next_scroll)
+            stop.wait(max(0.0, next_wake - time.monotonic()))
     except KeyboardInterrupt:
+        # Ctrl-C only: a stop through the event (SIGTERM or the rotator) leaves the last frame up
         lcd.clear(); lcd.write_string("Stopped")
         lcd.backlight_enabled = True
 
+def run(stop_event):
+    """In-process entry point for i2c_rotator.py: show the fun pack until stop_event is set."""
+    main(stop_event)
+
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, lambda *_: STOP.set())
     main()
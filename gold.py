@@ -7,9 +7,17 @@ convert to INR per 10g, display on 16x2 LCD as 'GOLD10g Rs<val>' and 'SILV10g Rs
 Retries + cache fallback.
 """
 
-import os, time, requests, json
-from datetime import datetime
+import os, requests, signal, threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from RPLCD.i2c import CharLCD
+from smbus2 import SMBus
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+from i2c_common import (flush_frame, shared_get, shared_set, http_session, json_loads,
+                        fetch_or_stop)
 
 # CONFIG
 LCD_DRIVER = 'PCF8574'
@@ -17,8 +25,10 @@ LCD_ADDR = 0x27
 I2C_PORT = 1
 COLS = 16
 
-UPDATE_INTERVAL = 300
-CACHE_FILE = "/tmp/gold_silver_cache.json"
+UPDATE_INTERVAL = 900                # GoldAPI is rate limited; gold barely moves in 15 min
+HTTP_CACHE = "/tmp/i2c_http_cache"   # sqlite response cache shared by the ticker scripts
+CACHE_TTL = 850                      # just under UPDATE_INTERVAL, so each scheduled fetch goes out
+SHARED_TTL = 3600                    # last good prices kept in Redis for other scripts/restarts
 RETRIES = 3
 TIMEOUT = 8
 TROY_OUNCE_TO_GRAMS = 31.1034768
@@ -26,46 +36,53 @@ TROY_OUNCE_TO_GRAMS = 31.1034768
 GOLDAPI_BASE = "https://www.goldapi.io/api"
 GOLDAPI_KEY = os.environ.get("GOLDAPI_KEY", "").strip()  # must be set
 
+# gold and silver requests run side by side
+POOL = ThreadPoolExecutor(max_workers=2)
+
 # LCD init
 lcd = CharLCD(LCD_DRIVER, LCD_ADDR, port=I2C_PORT, cols=COLS, rows=2)
 lcd.backlight_enabled = True
+bus = SMBus(I2C_PORT)
 
-# helpers
-def save_cache(d):
-    try:
-        with open(CACHE_FILE, "w") as f:
-            json.dump(d, f)
-    except Exception:
-        pass
+# keep-alive session; failed connects/reads are retried RETRIES times with backoff.
+# With requests_cache installed it is backed by a disk cache: fresh hits skip the network,
+# and an expired copy is served (flagged is_expired) if the API is unreachable.
+CACHE = (requests_cache.CachedSession(HTTP_CACHE, backend="sqlite", expire_after=CACHE_TTL,
+                                      stale_if_error=True) if requests_cache else None)
+SESSION = http_session(CACHE, retries=RETRIES)
 
-def load_cache():
-    try:
-        with open(CACHE_FILE, "r") as f:
-            return json.load(f)
-    except Exception:
-        return None
+# set on SIGTERM (systemd stop) or by the rotator; the loop waits on it so it exits without polling
+STOP = threading.Event()
 
+# helpers
 def call_goldapi(symbol):
-    """Call GoldAPI endpoint /api/<symbol>/INR and return JSON dict or None."""
+    """
+    Call GoldAPI endpoint /api/<symbol>/INR.
+    Return (JSON dict or None, stale) where stale means an expired cached copy was served.
+    """
     if not GOLDAPI_KEY:
-        return None
+        return None, False
     url = f"{GOLDAPI_BASE}/{symbol}/INR"
     headers = {"x-access-token": GOLDAPI_KEY}
-    for _ in range(RETRIES):
+    try:
+        r = SESSION.get(url, headers=headers, timeout=TIMEOUT)
+        # if unauthorized or bad key, let caller inspect r.status_code / r.text
+        r.raise_for_status()
+        return json_loads(r.content), getattr(r, "is_expired", False)
+    except requests.exceptions.HTTPError:
+        # if key invalid (401/403) or rate-limited (429), return the response for inspection
         try:
-            r = requests.get(url, headers=headers, timeout=TIMEOUT)
-            # if unauthorized or bad key, let caller inspect r.status_code / r.text
-            r.raise_for_status()
-            return r.json()
-        except requests.exceptions.HTTPError:
-            # if key invalid (401/403) or rate-limited (429), return the response for inspection
-            try:
-                return r.json()
-            except Exception:
-                return {"error": f"HTTP {r.status_code}"}
+            return json_loads(r.content), False
         except Exception:
-            time.sleep(1)
-    return None
+            return {"error": f"HTTP {r.status_code}"}, False
+    except Exception:
+        return None, False
+
+def fetch_metals():
+    """Fetch gold and silver side by side -> ((gold resp, stale), (silver resp, stale))."""
+    fut_xau = POOL.submit(call_goldapi, "XAU")
+    fut_xag = POOL.submit(call_goldapi, "XAG")
+    return fut_xau.result(), fut_xag.result()
 
 def inr_per_10g_from_goldapi_resp(resp):
     """Given GoldAPI response dict, extract price (INR per ounce) and convert to INR per 10g."""
@@ -88,6 +105,7 @@ def fmt_int_no_commas(n):
     except Exception:
         return "ERR"
 
+@lru_cache(maxsize=2)
 def build_lines(gold_10g, silver_10g, cached=False):
     def fmt(label, val):
         if val is None:
@@ -104,51 +122,54 @@ def build_lines(gold_10g, silver_10g, cached=False):
         return s.ljust(COLS)
     return fmt("GOLD", gold_10g), fmt("SILV", silver_10g)
 
-def main():
-    cache = load_cache() or {}
+def main(stop=STOP):
+    lcd_rows = [None, None]
     try:
-        while True:
-            used_cache = False
-            gold_10g = silver_10g = None
-
-            # fetch gold
-            gresp = call_goldapi("XAU")
-            xau_from_api = inr_per_10g_from_goldapi_resp(gresp) if isinstance(gresp, dict) else None
-
-            # fetch silver
-            sresp = call_goldapi("XAG")
-            xag_from_api = inr_per_10g_from_goldapi_resp(sresp) if isinstance(sresp, dict) else None
-
-            if xau_from_api is not None or xag_from_api is not None:
-                # prefer API values when present
-                gold_10g = xau_from_api or cache.get("gold_10g")
-                silver_10g = xag_from_api or cache.get("silver_10g")
-                cache = {"gold_10g": gold_10g, "silver_10g": silver_10g, "updated": datetime.now().isoformat()}
-                save_cache(cache)
-            else:
-                # fallback to cache
-                if cache:
-                    gold_10g = cache.get("gold_10g")
-                    silver_10g = cache.get("silver_10g")
-                    used_cache = True
-
+        while not stop.is_set():
+            # failed requests fall back to the response cache, which flags the value as stale
+            res = fetch_or_stop(stop, fetch_metals)
+            if res is None:   # stopped mid-fetch
+                break
+            (gresp, gold_stale), (sresp, silver_stale) = res
+            gold_10g = inr_per_10g_from_goldapi_resp(gresp) if isinstance(gresp, dict) else None
+            silver_10g = inr_per_10g_from_goldapi_resp(sresp) if isinstance(sresp, dict) else None
+            used_cache = gold_stale or silver_stale
+            # only fresh values are shared; an expired cached copy must not renew the TTL
+            shared_set({"gold:gold_10g": None if gold_stale else gold_10g,
+                        "gold:silver_10g": None if silver_stale else silver_10g}, SHARED_TTL)
+            if gold_10g is None or silver_10g is None:
+                # nothing usable even from the response cache; try the shared copy
+                g_s, s_s = shared_get("gold:gold_10g", "gold:silver_10g")
+                if gold_10g is None and g_s:
+                    gold_10g, used_cache = float(g_s), True
+                if silver_10g is None and s_s:
+                    silver_10g, used_cache = float(s_s), True
+
+            # the LCD shows whole rupees; rounding first lets an unchanged price reuse the lines
+            gold_10g = round(gold_10g) if gold_10g is not None else None
+            silver_10g = round(silver_10g) if silver_10g is not None else None
             l1, l2 = build_lines(gold_10g, silver_10g, cached=used_cache)
             try:
-                lcd.cursor_pos = (0,0); lcd.write_string(l1)
-                lcd.cursor_pos = (1,0); lcd.write_string(l2)
+                flush_frame(bus, LCD_ADDR, l1, l2, lcd_rows)
             except Exception:
+                lcd_rows[:] = [None, None]
                 try:
                     lcd.clear()
-                    lcd.cursor_pos = (0,0); lcd.write_string(l1)
-                    lcd.cursor_pos = (1,0); lcd.write_string(l2)
+                    flush_frame(bus, LCD_ADDR, l1, l2, lcd_rows)
                 except Exception:
                     pass
 
-            time.sleep(UPDATE_INTERVAL)
+            stop.wait(UPDATE_INTERVAL)
     except KeyboardInterrupt:
+        # Ctrl-C only: a stop through the event (SIGTERM or the rotator) leaves the last frame up
         lcd.clear()
         lcd.write_string("Stopped".ljust(COLS))
         lcd.backlight_enabled = True
 
+def run(stop_event):
+    """In-process entry point for i2c_rotator.py: show the ticker until stop_event is set."""
+    main(stop_event)
+
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, lambda *_: STOP.set())
     main()
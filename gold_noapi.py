@@ -11,9 +11,17 @@ Fallback: show Gold/Silver INR per 10g using:
 Display: "GOLD10g Rs123456" and "SILV10g Rs123456" (ASCII Rs, no commas)
 """
 
-import time, requests, json, os
+import time, json, os, math
 from datetime import datetime
 from RPLCD.i2c import CharLCD
+from i2c_common import write_rows, http_session
+try:
+    # orjson if installed; its dumps returns bytes, so the stdlib fallback does too
+    from orjson import loads as json_loads, dumps as json_dumps
+except ImportError:
+    from json import loads as json_loads
+    def json_dumps(obj):
+        return json.dumps(obj).encode()
 
 # ---------- CONFIG ----------
 LCD_DRIVER = 'PCF8574'
@@ -29,6 +37,7 @@ SILVER_UNIT = '10g'
 GOLDPRICE_ENDPOINT = "https://data-asg.goldprice.org/dbXRates/USD"
 EXCHANGE_ENDPOINT  = "https://open.er-api.com/v6/latest/USD"
 CACHE_FILE = "/tmp/gold_silver_cache.json"
+INR_TTL = 3600                      # USD->INR barely moves intraday; refetch it hourly
 
 RETRIES = 3
 TIMEOUT = 8
@@ -38,55 +47,70 @@ TROY_OUNCE_TO_GRAMS = 31.1034768
 lcd = CharLCD(LCD_DRIVER, LCD_ADDR, port=I2C_PORT, cols=COLS, rows=2)
 lcd.backlight_enabled = True
 
+# keep-alive session; failed connects/reads and 502/503/504 replies are retried RETRIES times with backoff
+SESSION = http_session(retries=RETRIES, status=(502, 503, 504), pool=(4, 4),
+                       headers={"User-Agent": "Mozilla/5.0"})
+
 # ---------- helpers ----------
 def save_cache(d):
     try:
-        with open(CACHE_FILE, "w") as f:
-            json.dump(d, f)
+        with open(CACHE_FILE, "wb") as f:
+            f.write(json_dumps(d))
     except Exception:
         pass
 
 def load_cache():
     try:
-        with open(CACHE_FILE, "r") as f:
-            return json.load(f)
+        with open(CACHE_FILE, "rb") as f:
+            return json_loads(f.read())
     except Exception:
         return None
 
 def fetch_spot():
     """Return (xau_usd_per_oz, xag_usd_per_oz) or (None,None)"""
-    for _ in range(RETRIES):
-        try:
-            r = requests.get(GOLDPRICE_ENDPOINT, timeout=TIMEOUT, headers={"User-Agent":"Mozilla/5.0"})
-            r.raise_for_status()
-            j = r.json()
-            items = j.get("items") or []
-            if items:
-                it = items[0]
-                xau = it.get("xauPrice")
-                xag = it.get("xagPrice")
-                if xau is not None and xag is not None:
-                    return float(xau), float(xag)
-            # if structure changed, try deep-inspect
-            # (we avoid heavy parsing here)
-        except Exception:
-            time.sleep(1)
+    try:
+        r = SESSION.get(GOLDPRICE_ENDPOINT, timeout=TIMEOUT)
+        r.raise_for_status()
+        j = json_loads(r.content)
+        items = j.get("items") or []
+        if items:
+            it = items[0]
+            xau = it.get("xauPrice")
+            xag = it.get("xagPrice")
+            if xau is not None and xag is not None:
+                return float(xau), float(xag)
+        # if structure changed, try deep-inspect
+        # (we avoid heavy parsing here)
+    except Exception:
+        pass
     return None, None
 
 def fetch_usd_rates():
     """Return rates dict or None"""
-    for _ in range(RETRIES):
-        try:
-            r = requests.get(EXCHANGE_ENDPOINT, timeout=TIMEOUT)
-            r.raise_for_status()
-            j = r.json()
-            rates = j.get("rates") or j.get("conversion_rates")
-            if isinstance(rates, dict):
-                return rates
-        except Exception:
-            time.sleep(1)
+    try:
+        r = SESSION.get(EXCHANGE_ENDPOINT, timeout=TIMEOUT)
+        r.raise_for_status()
+        j = json_loads(r.content)
+        rates = j.get("rates") or j.get("conversion_rates")
+        if isinstance(rates, dict):
+            return rates
+    except Exception:
+        pass
     return None
 
+def get_inr(cache):
+    """Return (inr_per_usd, stale), reusing the rate in `cache` for INR_TTL seconds.
+    A refreshed rate is persisted with the cache; if the refresh fails the last rate is reused."""
+    if cache.get("inr") and time.time() - cache.get("inr_ts", 0) < INR_TTL:
+        return cache["inr"], False
+    rates = fetch_usd_rates()
+    inr = rates.get("INR") if rates else None
+    if inr:
+        cache["inr"], cache["inr_ts"] = float(inr), time.time()
+        save_cache(cache)
+        return cache["inr"], False
+    return cache.get("inr"), True
+
 def per_unit_usd(usd_per_ounce, unit):
     if usd_per_ounce is None:
         return None
@@ -101,7 +125,9 @@ def per_unit_usd(usd_per_ounce, unit):
 
 def fmt_int_no_commas(n):
     try:
-        return str(int(round(n)))
+        if not math.isfinite(n):
+            return "ERR"    # int(round(n)) raised here; the format spec would print "nan"/"inf"
+        return f"{n:.0f}"   # rounds in C, same half-to-even result as int(round(n))
     except Exception:
         return "ERR"
 
@@ -122,47 +148,39 @@ def build_lines(gold_10g, silver_10g, cached=False):
         return s.ljust(COLS)
     return fmt("GOLD", gold_10g), fmt("SILV", silver_10g)
 
+# rows as last written to the LCD; only the changed span of a row is resent
+shadow = [None, None]
+
 # ---------- main ----------
 def main():
     cache = load_cache() or {}
     try:
         while True:
             xau_usd, xag_usd = fetch_spot()
-            rates = fetch_usd_rates()
+            inr, inr_stale = get_inr(cache)
             gold_10g = silver_10g = None
             used_cache = False
 
-            if xau_usd is not None and xag_usd is not None and rates:
-                inr = rates.get("INR")
-                if inr:
-                    inr = float(inr)
-                    gold_usd = per_unit_usd(xau_usd, GOLD_UNIT)
-                    silver_usd = per_unit_usd(xag_usd, SILVER_UNIT)
-                    gold_inr = gold_usd * inr * CORRECTION_MULTIPLIER
-                    silver_inr = silver_usd * inr * CORRECTION_MULTIPLIER
-                    gold_10g = gold_inr
-                    silver_10g = silver_inr
-                    cache = {"gold_10g": gold_10g, "silver_10g": silver_10g, "updated": datetime.now().isoformat()}
-                    save_cache(cache)
+            if xau_usd is not None and xag_usd is not None and inr:
+                gold_usd = per_unit_usd(xau_usd, GOLD_UNIT)
+                silver_usd = per_unit_usd(xag_usd, SILVER_UNIT)
+                gold_inr = gold_usd * inr * CORRECTION_MULTIPLIER
+                silver_inr = silver_usd * inr * CORRECTION_MULTIPLIER
+                gold_10g = gold_inr
+                silver_10g = silver_inr
+                used_cache = inr_stale
+                cache.update(gold_10g=gold_10g, silver_10g=silver_10g, updated=datetime.now().isoformat())
+                save_cache(cache)
             else:
                 # fallback to cache if available
-                c = load_cache() or cache
+                c = cache   # already loaded at start-up and kept current in memory
                 if c:
                     gold_10g = c.get("gold_10g")
                     silver_10g = c.get("silver_10g")
                     used_cache = True
 
             l1, l2 = build_lines(gold_10g, silver_10g, cached=used_cache)
-            try:
-                lcd.cursor_pos = (0,0); lcd.write_string(l1)
-                lcd.cursor_pos = (1,0); lcd.write_string(l2)
-            except Exception:
-                try:
-                    lcd.clear()
-                    lcd.cursor_pos = (0,0); lcd.write_string(l1)
-                    lcd.cursor_pos = (1,0); lcd.write_string(l2)
-                except Exception:
-                    pass
+            write_rows(lcd, ((0, l1), (1, l2)), shadow)
 
             time.sleep(UPDATE_INTERVAL)
     except KeyboardInterrupt:
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# i2c_common.py
+# Helpers shared by the LCD scripts: raw PCF8574 frame writes, precomputed scroll windows
+# and the optional Redis store the tickers keep their last good values in.
+# Lives next to the scripts in /root/I2C, so a plain `from i2c_common import ...` finds it.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from smbus2 import i2c_msg
+try:
+    from orjson import loads as json_loads   # faster JSON parsing when orjson is installed
+except ImportError:
+    from json import loads as json_loads
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# PCF8574 backpack bits: data on P4-P7, backlight P3, enable P2, register-select P0
+PCF_BACKLIGHT = 0x08
+PCF_ENABLE = 0x04
+PCF_RS = 0x01
+
+def lcd_nibbles(byte, rs=0):
+    """Backpack bytes that clock one HD44780 byte in as two E-pulsed nibbles."""
+    hi = (byte & 0xF0) | rs | PCF_BACKLIGHT
+    lo = ((byte << 4) & 0xF0) | rs | PCF_BACKLIGHT
+    return (hi | PCF_ENABLE, hi, lo | PCF_ENABLE, lo)
+
+# backpack bytes for every data byte, so a row is a table lookup per character
+DATA_NIBBLES = [bytes(lcd_nibbles(b, PCF_RS)) for b in range(256)]
+
+def changed_span(old, new):
+    """Return (first, last) indices where `new` differs from `old`, or None if equal."""
+    if old == new:
+        return None
+    if old is None or len(old) != len(new):
+        return 0, len(new) - 1
+    first = next(i for i, (a, b) in enumerate(zip(old, new)) if a != b)
+    last = next(i for i in range(len(new) - 1, first - 1, -1) if old[i] != new[i])
+    return first, last
+
+def flush_frame(bus, addr, top, bot, cache):
+    """Send the changed spans of both rows as a single I2C write; `cache` holds the rows on screen."""
+    buf = bytearray()
+    for row, new in ((0, top), (1, bot)):
+        span = changed_span(cache[row], new)
+        if span is None:
+            continue
+        first, last = span
+        buf.extend(lcd_nibbles(0x80 | (0x40 * row + first)))
+        buf += b"".join([DATA_NIBBLES[ch] for ch in new[first:last + 1].encode("ascii", "replace")])
+    if buf:
+        bus.i2c_rdwr(i2c_msg.write(addr, buf))
+    cache[0], cache[1] = top, bot
+
+def write_rows(lcd, rows, shadow):
+    """RPLCD counterpart of flush_frame: write the changed span of each (row, text) pair through
+    `lcd`, keeping `shadow` as the rows on screen. After an I2C error pause briefly and resend
+    whole rows once, without lcd.clear() (cursor_pos + write_string is idempotent)."""
+    for _ in range(2):
+        try:
+            for row, text in rows:
+                span = changed_span(shadow[row], text)
+                if span is not None:
+                    first, last = span
+                    lcd.cursor_pos = (row, first); lcd.write_string(text[first:last + 1])
+                    shadow[row] = text
+            return
+        except Exception:
+            shadow[:] = [None] * len(shadow)   # screen state unknown: resend whole rows
+            time.sleep(0.05)
+
+def build_windows(full_s, cols=16, gap="    "):
+    """Return every `cols`-wide window of full_s as it scrolls (a single window if it fits)."""
+    if len(full_s) <= cols:
+        return [full_s.ljust(cols)]
+    scroll = full_s + gap
+    wrapped = scroll + scroll[:cols - 1]   # only the tail the last windows wrap into
+    return [wrapped[i:i + cols] for i in range(len(scroll))]
+
+def scroll_window(windows, base_time, now_ts, static, step):
+    """Return (window, next_ts): the visible text and when it next changes.
+    The first window holds for `static` seconds, then the text advances one cell every `step`."""
+    if len(windows) == 1:
+        return windows[0], float("inf")
+    static_until = base_time + static
+    if now_ts < static_until:
+        return windows[0], static_until
+    n = int((now_ts - static_until) / step)
+    return windows[n % len(windows)], static_until + (n + 1) * step
+
+# optional Redis on a local socket, shared by all ticker scripts; without it these are no-ops
+REDIS_SOCKET = "/run/redis/redis.sock"
+R = redis.Redis(unix_socket_path=REDIS_SOCKET, socket_timeout=0.5) if redis else None
+
+def shared_get(*keys):
+    """Read keys from Redis in one MGET; misses (or no Redis) come back as None."""
+    if R is None:
+        return [None] * len(keys)
+    try:
+        return [v.decode() if v is not None else None for v in R.mget(keys)]
+    except Exception:
+        return [None] * len(keys)
+
+def shared_set(values, ttl):
+    """Store the non-None entries of a {key: value} dict in Redis with a TTL, pipelined."""
+    if R is None:
+        return
+    try:
+        pipe = R.pipeline()
+        for key, val in values.items():
+            if val is not None:
+                pipe.set(key, val, ex=ttl)
+        pipe.execute()
+    except Exception:
+        pass
+
+def http_session(session=None, retries=3, backoff=1, status=(), pool=(4, 8), headers=None):
+    """Mount a keep-alive HTTPS adapter on `session` (a plain requests.Session by default) and return it.
+    urllib3 retries failed connects and reads `retries` times with exponential `backoff`; HTTP error
+    statuses are only retried when listed in `status`. `pool` is (pool_connections, pool_maxsize)."""
+    import requests   # imported here so the LCD-only scripts don't need it installed
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    s = requests.Session() if session is None else session
+    if headers:
+        s.headers.update(headers)
+    s.mount("https://", HTTPAdapter(pool_connections=pool[0], pool_maxsize=pool[1],
+                                    max_retries=Retry(total=retries, backoff_factor=backoff,
+                                                      status_forcelist=list(status))))
+    return s
+
+# fetches run by fetch_or_stop; one abandoned by a stop finishes here on its own time
+_FETCHERS = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fetch")
+
+def fetch_or_stop(stop, fn, *args):
+    """Run fn(*args) on a worker thread and return its result, or None as soon as `stop` is set.
+    A request stuck in its timeout/retry backoff then can't hold a stopping script on screen;
+    its late result is simply dropped."""
+    fut = _FETCHERS.submit(fn, *args)
+    while not fut.done():
+        if stop.wait(0.1):
+            return None
+    return fut.result()
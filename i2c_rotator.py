@@ -5,8 +5,12 @@ i2c_rotator_by_script.py
 Rotation manager that runs display scripts sequentially. Each entry in SCRIPTS can be:
  - "/full/path/to/script.py"              # uses DEFAULT_DURATION
  - ("/full/path/to/script.py", 180)       # runs 180 seconds for this script
+ - ("crypto", 30)                         # module in SCRIPT_DIR with run(stop_event), run in-process
+                                          # (run as SCRIPT_DIR/crypto.py if it can't be imported here)
 
-Only one process owns the display at a time. The rotator kills each script after its duration.
+Only one script owns the display at a time. The rotator kills each script after its duration;
+in-process modules are imported once, run in a thread and told to stop via their event; their
+fetches wait on that event too, so a stop takes effect within a fraction of a second.
 """
 
 import subprocess
@@ -14,7 +18,8 @@ import time
 import os
 import signal
 import sys
-from datetime import datetime
+import importlib
+import threading
 
 # ---------- CONFIG ----------
 # Edit this list to include your scripts. Use strings or (path, seconds) tuples.
@@ -26,11 +31,15 @@ SCRIPTS = [
     ("/root/I2C/blink.py", 2),           # 1 minutes
     ("/root/I2C/tempi2ctrend.py", 60),
     ("/root/I2C/blink.py", 2),           # 1 minutes
-    ("/root/I2C/crypto.py", 30),               # 1 minutes
+    ("crypto", 30),                            # in-process (run(stop_event))
     ("/root/I2C/blink.py", 2),           # 1 minutes
     ("/root/I2C/gold_noapi.py", 30),                 # 1 minutes
     ("/root/I2C/blink.py", 2),           # 1 minutes
-    ("/root/I2C/dollar.py", 30),               # 1 minutes
+    ("dollar", 30),                            # in-process
+    ("/root/I2C/blink.py", 2),           # 1 minutes
+    ("bsenifty", 30),                          # in-process
+    ("/root/I2C/blink.py", 2),           # 1 minutes
+    ("fact", 30),                              # in-process
     ("/root/I2C/blink.py", 2),           # 1 minutes
     ("/root/I2C/tempi2ctrend.py", 60),
     ("/root/I2C/blink.py", 3),           # 1 minutes
@@ -38,18 +47,27 @@ SCRIPTS = [
 #    ("/root/I2C/blink.py", 2),           # 1 minutes
 #    ("/root/I2C/nifty.py", 200),               # 3 minutes
 #    ("/root/I2C/tempi2ctrend.py", 60),
+#    ("gold", 30),                             # in-process; needs GOLDAPI_KEY (gold_noapi above doesn't)
+#    ("funpack", 60),                          # in-process; word/fact/joke mix, overlaps fact
 ]
 
 DEFAULT_DURATION = 300   # seconds if a script is listed as string only
 SLEEP_AFTER_STOP = 0.6   # seconds to wait after stopping a script
+SCRIPT_DIR = "/root/I2C"           # where in-process modules are imported from
 PYTHON = "/root/lcdenv/bin/python"  # change to your venv python if needed (e.g. /root/lcdenv/bin/python)
 
 VERBOSE = True
 
 # ---------- helpers ----------
+_stamp = [None, ""]   # (epoch second, formatted) of the last log line
+
 def log(msg):
     if VERBOSE:
-        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}", flush=True)
+        # a rotation logs several lines in the same second; format the timestamp once per second
+        now = int(time.time())
+        if now != _stamp[0]:
+            _stamp[0], _stamp[1] = now, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+        print(f"[{_stamp[1]}] {msg}", flush=True)
 
 def normalize_scripts(scripts):
     """Return list of (path, duration) pairs. Expand strings with default duration."""
@@ -89,6 +107,47 @@ def run_script(path):
         log(f"Failed to start {path}: {e}")
         return None
 
+def is_module(entry):
+    """SCRIPTS entries without a .py path are modules run in-process."""
+    return not entry.endswith(".py")
+
+# name -> thread of the last in-process run, so a module still winding down isn't started twice
+_threads = {}
+
+def run_module(name):
+    """Import `name` (cached after the first rotation) and start its run(stop_event) in a thread.
+    Returns (thread, event), or None on failure or if its previous run has not finished yet.
+    Raises ImportError when the module or one of its dependencies can't be imported here."""
+    prev = _threads.get(name)
+    if prev is not None and prev.is_alive():
+        log(f"{name} is still stopping from its last turn; skipping it")
+        return None
+    try:
+        if SCRIPT_DIR not in sys.path:
+            sys.path.insert(0, SCRIPT_DIR)
+        mod = importlib.import_module(name)
+        ev = threading.Event()
+        t = threading.Thread(target=mod.run, args=(ev,), name=name, daemon=True)
+        t.start()
+        _threads[name] = t
+        log(f"Started in-process: {name}")
+        return t, ev
+    except ImportError:
+        raise
+    except Exception as e:
+        log(f"Failed to start {name}: {e}")
+        return None
+
+def stop_module(handle):
+    """Signal an in-process script to stop and give it a moment to write its last frame."""
+    if handle is None:
+        return
+    t, ev = handle
+    ev.set()
+    t.join(timeout=4.0)
+    if t.is_alive():
+        log(f"{t.name} did not stop within 4s")
+
 def stop_process(p):
     """Terminate a process group gracefully, then force-kill if needed."""
     if p is None:
@@ -98,14 +157,13 @@ def stop_process(p):
         pgid = os.getpgid(pid)
         log(f"Stopping pid {pid} (pgid {pgid})")
         os.killpg(pgid, signal.SIGTERM)
-        # wait briefly for graceful exit
-        for _ in range(40):  # up to ~4s
-            if p.poll() is not None:
-                break
-            time.sleep(0.1)
-        if p.poll() is None:
+        # wait briefly for graceful exit; returns as soon as the child is reaped
+        try:
+            p.wait(timeout=4.0)
+        except subprocess.TimeoutExpired:
             log(f"Force-killing pid {pid}")
             os.killpg(pgid, signal.SIGKILL)
+            p.wait(timeout=1.0)
     except ProcessLookupError:
         pass
     except Exception as e:
@@ -125,23 +183,34 @@ def main():
         while True:
             path, duration = normalized[idx % len(normalized)]
             log(f"Next: {path} for {duration}s")
+            if is_module(path):
+                try:
+                    handle = run_module(path)
+                except ImportError as e:
+                    # e.g. the rotator runs outside the venv: run it as a script under PYTHON instead
+                    log(f"Cannot import {path} ({e}); running it as a script")
+                    path = os.path.join(SCRIPT_DIR, path + ".py")
+                else:
+                    if handle is not None:
+                        handle[0].join(timeout=duration)
+                        log(f"{'Time up for' if handle[0].is_alive() else 'Early exit of'} {path}.")
+                    stop_module(handle)
+                    time.sleep(SLEEP_AFTER_STOP)
+                    idx += 1
+                    continue
+
             current_proc = run_script(path)
-            start_time = time.time()
-
-            # run loop: check if process is alive and duration not exceeded
-            while True:
-                if current_proc is None:
-                    log(f"Process for {path} failed to start; moving on.")
-                    break
-                if current_proc.poll() is not None:
+            start_time = time.monotonic()
+
+            # block until the script exits or its time is up (no polling wakeups)
+            if current_proc is None:
+                log(f"Process for {path} failed to start; moving on.")
+            else:
+                try:
+                    current_proc.wait(timeout=duration)
                     log(f"Process {path} exited early (code {current_proc.returncode}).")
-                    break
-                elapsed = time.time() - start_time
-                if elapsed >= duration:
-                    log(f"Time up for {path} ({int(elapsed)}s).")
-                    break
-                # responsive sleep
-                time.sleep(0.5)
+                except subprocess.TimeoutExpired:
+                    log(f"Time up for {path} ({int(time.monotonic() - start_time)}s).")
 
             # stop the process if still running
             stop_process(current_proc)
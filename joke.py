@@ -2,25 +2,31 @@
 # i2c_joke.py
 # Fetch a random joke and display on 16x2 I2C LCD. Top: "JOKE"; Bottom: scrolling "setup — punchline".
 
-import time, requests
+import time
 from RPLCD.i2c import CharLCD
+from i2c_common import (write_rows, build_windows, scroll_window, http_session,
+                        json_loads)
 
 LCD_DRIVER='PCF8574'; LCD_ADDR=0x27; I2C_PORT=1; COLS=16
 UPDATE_INTERVAL=60            # fetch new joke every 60s (script typically run for some minutes)
 STATIC_DISPLAY=2.0
 SCROLL_STEP=0.15
 SCROLL_GAP="    "
+TOP_JOKE="JOKE".center(COLS)
 
 lcd = CharLCD(LCD_DRIVER, LCD_ADDR, port=I2C_PORT, cols=COLS, rows=2)
 lcd.backlight_enabled = True
 
+# keep-alive session; failed connects/reads are retried 3 times with backoff
+SESSION = http_session(pool=(4, 4))
+
 JOKE_API = "https://official-joke-api.appspot.com/random_joke"
 
 def fetch_joke():
     try:
-        r = requests.get(JOKE_API, timeout=8)
+        r = SESSION.get(JOKE_API, timeout=8)
         r.raise_for_status()
-        j = r.json()
+        j = json_loads(r.content)
         setup = j.get("setup","")
         punch = j.get("punchline","")
         text = f"{setup} — {punch}"
@@ -28,20 +34,8 @@ def fetch_joke():
     except Exception:
         return None
 
-def scroll_window(full_s, base_time, now_ts):
-    if not full_s:
-        return "".ljust(COLS)
-    if len(full_s) <= COLS:
-        return full_s.ljust(COLS)
-    static_until = base_time + STATIC_DISPLAY
-    if now_ts < static_until:
-        return full_s[:COLS].ljust(COLS)
-    scroll = full_s + SCROLL_GAP; total = len(scroll)
-    elapsed = now_ts - static_until
-    step = int(elapsed / SCROLL_STEP)
-    pos = step % total
-    wrapped = scroll + scroll
-    return wrapped[pos:pos+COLS]
+# rows as last written to the LCD; only the changed span of a row is resent
+shadow = [None, None]
 
 def main():
     last_fetch = 0
@@ -49,7 +43,7 @@ def main():
     base_time = 0
     try:
         while True:
-            now = time.time()
+            now = time.monotonic()
             if now - last_fetch >= UPDATE_INTERVAL or text is None:
                 txt = fetch_joke()
                 if txt:
@@ -58,21 +52,13 @@ def main():
                 else:
                     text = "No joke right now."
                     base_time = now
+                windows = build_windows(text, COLS, SCROLL_GAP)   # cut once per joke, indexed per frame
                 last_fetch = now
 
-            top = "JOKE".center(COLS)
-            bottom = scroll_window(text, base_time, time.time())
+            top = TOP_JOKE
+            bottom, _ = scroll_window(windows, base_time, time.monotonic(), STATIC_DISPLAY, SCROLL_STEP)
 
-            try:
-                lcd.cursor_pos = (0,0); lcd.write_string(top)
-                lcd.cursor_pos = (1,0); lcd.write_string(bottom)
-            except Exception:
-                try:
-                    lcd.clear()
-                    lcd.cursor_pos = (0,0); lcd.write_string(top)
-                    lcd.cursor_pos = (1,0); lcd.write_string(bottom)
-                except Exception:
-                    pass
+            write_rows(lcd, ((0, top), (1, bottom)), shadow)
 
             time.sleep(0.12)
     except KeyboardInterrupt:
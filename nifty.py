@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 # nifty50_clean.py
 # Two-row Nifty50 ticker: price + arrow + percent, no greetings/sensex/weather.
-# Blocking refresh: fetches fresh data with yf.download for all symbols.
+# Blocking refresh: one batched yf.download for all symbols.
 
 import time
 import datetime
-import yfinance as yf
 from RPLCD.i2c import CharLCD
+from smbus2 import SMBus
+from i2c_common import flush_frame
 
 # ---------- CONFIG ----------
 LCD_DRIVER = 'PCF8574'
@@ -15,9 +16,13 @@ COLS = 16
 ROWS = 2
 
 FETCH_INTERVAL = 120          # seconds between data refreshes
-SCROLL_DELAY = 0.30          # seconds per scroll step
+SCROLL_DELAY = 0.20          # seconds per scroll step
 UPDATE_SPLASH_SECONDS = 1    # brief "Updating..." splash before fetch
 
+# fixed splash lines, centered once
+FETCH_MSG1 = "Fetching prices".center(COLS)
+FETCH_MSG2 = "Please wait...".center(COLS)
+
 # Nifty50 symbols (Yahoo Finance .NS suffix)
 NIFTY50 = [
     "ADANIPORTS.NS","ASIANPAINT.NS","AXISBANK.NS","BAJAJ-AUTO.NS",
@@ -37,6 +42,7 @@ NIFTY50 = [
 # ---------- LCD init ----------
 lcd = CharLCD(LCD_DRIVER, LCD_ADDR, port=1, cols=COLS, rows=ROWS)
 lcd.backlight_enabled = True
+bus = SMBus(1)
 
 # Custom arrow characters (▲ = \x00, ▼ = \x01)
 lcd.create_char(0, (
@@ -61,22 +67,30 @@ lcd.create_char(1, (
 ))
 
 # ---------- State ----------
-# symbol -> (price float or None, change float or None, pct float or None)
-prices = {s: (None, None, None) for s in NIFTY50}
+# display names without the .NS suffix, worked out once
+SHORT = {s: s.replace(".NS", "") for s in NIFTY50}
+# symbol -> (price float or None, change float or None, pct float or None, formatted item)
+prices = {s: (None, None, None, SHORT[s] + ":ERR") for s in NIFTY50}
 last_fetch_time = None
 
 # ---------- Helpers ----------
-def short_name(sym):
-    return sym.replace(".NS", "")
-
 def fetch_prices_blocking(symbols):
     """
-    Batch fetch with yf.download for all symbols at once.
+    Fetch all symbols with one batched yf.download.
     Returns (mapping, error_str_or_None).
-    mapping: symbol -> (price, change, pct)
+    mapping: symbol -> (price, change, pct, formatted item)
     """
+    out, err = fetch_prices_yf(symbols)
+    # format every item once per fetch so build_line is a plain join
+    return {s: (p, ch, pct, format_item(SHORT[s], p, ch, pct))
+            for s, (p, ch, pct) in out.items()}, err
+
+def fetch_prices_yf(symbols):
+    """Batch fetch with yf.download for all symbols at once (yfinance is imported on demand)."""
     out = {}
     try:
+        import pandas as pd
+        import yfinance as yf
         data = yf.download(symbols, period="1d", interval="1m", progress=False, auto_adjust=False)
         if data is None or data.empty:
             data = yf.download(symbols, period="5d", interval="1d", progress=False, auto_adjust=False)
@@ -84,37 +98,20 @@ def fetch_prices_blocking(symbols):
                 raise RuntimeError("no data returned")
 
         closes = data['Close']
-        if len(closes) >= 2:
-            latest = closes.iloc[-1]
-            prev = closes.iloc[-2]
-        else:
-            latest = closes.iloc[-1]
-            prev = {}
-            for s in symbols:
-                try:
-                    tk = yf.Ticker(s)
-                    prev[s] = tk.info.get('previousClose', None)
-                except Exception:
-                    prev[s] = None
-            import pandas as pd
-            prev = pd.Series(prev)
-
+        if len(closes) < 2:
+            # a single row (e.g. just after the open): daily bars always carry a previous close
+            closes = yf.download(symbols, period="5d", interval="1d", progress=False, auto_adjust=False)['Close']
+        latest = closes.iloc[-1]
+        prev = closes.iloc[-2]
+        # whole-row Series arithmetic; a missing price or previous close comes out as NaN
+        ch = latest - prev
+        pct = ch / prev * 100.0
+
+        def num(v):
+            return None if v is None or pd.isna(v) else float(v)
         for s in symbols:
-            try:
-                lp = float(latest[s])
-            except Exception:
-                lp = None
-            try:
-                pv = float(prev[s]) if prev is not None else None
-            except Exception:
-                pv = None
-
-            if lp is None:
-                out[s] = (None, None, None)
-            else:
-                ch = None if pv is None else (lp - pv)
-                pct = None if pv is None else ((lp - pv) / pv * 100.0)
-                out[s] = (lp, ch, pct)
+            lp = num(latest.get(s))
+            out[s] = (None, None, None) if lp is None else (lp, num(ch.get(s)), num(pct.get(s)))
         return out, None
     except Exception as e:
         return {s: (None, None, None) for s in symbols}, str(e)
@@ -137,27 +134,27 @@ def format_item(name, price, change, pct):
     return f"{name}:{price_s}{arrow}{pct_s}"
 
 def build_line(symbols):
-    parts = []
-    for s in symbols:
-        p, ch, pct = prices.get(s, (None, None, None))
-        parts.append(format_item(short_name(s), p, ch, pct))
-    return " | ".join(parts)
+    return " | ".join(prices[s][3] for s in symbols)
+
+# rows currently on the LCD, so each frame only sends what changed
+lcd_rows = [None, None]
 
 def scroll_two_lines(top_text, bot_text):
-    top_s = top_text + "   "
-    bot_s = bot_text + "   "
-    maxlen = max(len(top_s), len(bot_s))
-    for shift in range(maxlen):
-        top_window = (top_s + " " * COLS)[shift:shift+COLS]
-        bot_window = (bot_s + " " * COLS)[shift:shift+COLS]
-        lcd.cursor_pos = (0, 0); lcd.write_string(top_window.ljust(COLS))
-        lcd.cursor_pos = (1, 0); lcd.write_string(bot_window.ljust(COLS))
-        time.sleep(SCROLL_DELAY)
+    # pad once and cut every frame up front; each window is exactly COLS wide
+    maxlen = max(len(top_text), len(bot_text)) + 3
+    top_s = top_text + "   " + " " * COLS
+    bot_s = bot_text + "   " + " " * COLS
+    frames = [(top_s[i:i+COLS], bot_s[i:i+COLS]) for i in range(maxlen)]
+    # steps run on a fixed schedule, so the I2C write time does not stretch the cadence
+    next_tick = time.monotonic()
+    for top_window, bot_window in frames:
+        flush_frame(bus, LCD_ADDR, top_window, bot_window, lcd_rows)
+        next_tick += SCROLL_DELAY
+        time.sleep(max(0.0, next_tick - time.monotonic()))
 
 def show_centered_lines(line1, line2, delay=1):
-    lcd.clear()
-    lcd.cursor_pos = (0, 0); lcd.write_string(line1.center(COLS))
-    lcd.cursor_pos = (1, 0); lcd.write_string(line2.center(COLS))
+    # overwrite both rows instead of lcd.clear(); the diff write only sends changed cells
+    flush_frame(bus, LCD_ADDR, line1.center(COLS), line2.center(COLS), lcd_rows)
     time.sleep(delay)
 
 # ---------- Main loop ----------
@@ -169,9 +166,7 @@ def main():
 
     # initial fetch
     show_centered_lines("Starting...", "")
-    lcd.clear()
-    lcd.cursor_pos = (0,0); lcd.write_string("Fetching prices".center(COLS))
-    lcd.cursor_pos = (1,0); lcd.write_string("Please wait...".center(COLS))
+    flush_frame(bus, LCD_ADDR, FETCH_MSG1, FETCH_MSG2, lcd_rows)
     new_prices, err = fetch_prices_blocking(NIFTY50)
     if err:
         show_centered_lines("Fetch error", err[:COLS], delay=3)
@@ -180,7 +175,7 @@ def main():
         last_fetch_time = datetime.datetime.now()
         show_centered_lines("Updated", last_fetch_time.strftime("%H:%M"), delay=1)
 
-    last_fetch_initiated = time.time()
+    last_fetch_initiated = time.monotonic()
     try:
         while True:
             # scroll current prices
@@ -189,12 +184,10 @@ def main():
             scroll_two_lines(top_line, bot_line)
 
             # time to refresh?
-            if time.time() - last_fetch_initiated >= FETCH_INTERVAL:
+            if time.monotonic() - last_fetch_initiated >= FETCH_INTERVAL:
                 show_centered_lines("Updating...", "", delay=UPDATE_SPLASH_SECONDS)
                 # blocking fetch (user OK with waiting)
-                lcd.clear()
-                lcd.cursor_pos = (0,0); lcd.write_string("Fetching prices".center(COLS))
-                lcd.cursor_pos = (1,0); lcd.write_string("Please wait...".center(COLS))
+                flush_frame(bus, LCD_ADDR, FETCH_MSG1, FETCH_MSG2, lcd_rows)
                 new_prices, err = fetch_prices_blocking(NIFTY50)
                 if err:
                     show_centered_lines("Fetch error", err[:COLS], delay=3)
@@ -202,7 +195,7 @@ def main():
                     prices.update(new_prices)
                     last_fetch_time = datetime.datetime.now()
                     show_centered_lines("Updated", last_fetch_time.strftime("%H:%M"), delay=1)
-                last_fetch_initiated = time.time()
+                last_fetch_initiated = time.monotonic()
     except KeyboardInterrupt:
         lcd.clear()
         lcd.write_string("Stopped")
@@ -3,11 +3,17 @@
 # System monitor with reliable time-driven scrolling.
 # Static pause resets only on IP or Root% changes to avoid temp jitter resets.
 
+import os
 import time
 import socket
 import shutil
+import threading
+import array
+import fcntl
+import struct
 from RPLCD.i2c import CharLCD
-import subprocess
+from smbus2 import SMBus
+from i2c_common import flush_frame
 
 # ---------- CONFIG ----------
 LCD_DRIVER = 'PCF8574'
@@ -15,8 +21,9 @@ LCD_ADDR = 0x27
 COLS = 16
 ROWS = 2
 
-REFRESH_INTERVAL = 2.0              # seconds between metric refreshes
-LOOP_SLEEP = 0.12                   # main loop sleep
+REFRESH_INTERVAL = 2.0              # seconds between metric refreshes (metrics thread)
+IP_REFRESH_INTERVAL = 60.0          # seconds between outbound-IP probes (a UDP socket each)
+ROOT_FS_TTL = 30.0                  # seconds a root-fs usage reading is reused
 IP_SCROLL_STEP = 0.3                # seconds per scroll step
 IP_GAP = "    "                     # gap between repeats when scrolling
 STATIC_DISPLAY_AFTER_UPDATE = 2.0   # seconds to show leftmost window before scrolling
@@ -25,18 +32,40 @@ VERBOSE = False                     # set True to print debug scroll info to con
 # ---------- LCD init ----------
 lcd = CharLCD(LCD_DRIVER, LCD_ADDR, port=1, cols=COLS, rows=ROWS)
 lcd.backlight_enabled = True
+bus = SMBus(1)
 
 # ---------- metric readers ----------
-def read_cpu_times():
+# /proc and /sys files stay open across samples and are re-read from offset 0 with one pread;
+# 8 KB holds all of /proc/meminfo, so each sample is one consistent snapshot
+_proc_fds = {}
+
+def read_proc(path, size=8192):
+    """Return the start of `path` as bytes via a cached fd, or None (the fd is reopened next time)."""
+    fd = _proc_fds.get(path)
     try:
-        with open("/proc/stat", "r") as f:
-            line = f.readline()
-    except Exception:
+        if fd is None:
+            fd = _proc_fds[path] = os.open(path, os.O_RDONLY)
+        return os.pread(fd, size, 0)
+    except OSError:
+        _proc_fds.pop(path, None)
+        if fd is not None:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
         return None
-    if not line.startswith("cpu "):
+
+def read_cpu_times():
+    # only the aggregate "cpu " line is used; a short read is enough for it (10 counters)
+    data = read_proc("/proc/stat", 256)
+    if data and b"\n" not in data:
+        data = read_proc("/proc/stat")   # counters too long for 256 bytes: read it all
+    # bytes all the way: match the prefix and parse the counters without decoding
+    if not data or not data.startswith(b"cpu "):
+        return None
+    vals = list(map(int, data[4:data.find(b"\n")].split()))
+    if len(vals) < 4:
         return None
-    parts = line.split()
-    vals = [int(p) for p in parts[1:]]
     idle = vals[3] + (vals[4] if len(vals) > 4 else 0)
     total = sum(vals)
     return idle, total
@@ -51,63 +80,87 @@ def get_cpu_percent(prev):
     total_delta = total - total_prev
     if total_delta <= 0:
         return None, now
-    usage = (1.0 - (idle_delta / total_delta)) * 100.0
-    return int(round(usage)), now
+    busy = total_delta - idle_delta
+    return (busy * 100 + total_delta // 2) // total_delta, now
+
+MEM_KEYS = (b"MemTotal:", b"MemAvailable:", b"MemFree:", b"Buffers:", b"Cached:")
 
 def get_mem_percent():
     try:
         meminfo = {}
-        with open("/proc/meminfo", "r") as f:
-            for line in f:
-                parts = line.split(":")
-                key = parts[0]
-                value = parts[1].strip().split()[0]
-                meminfo[key] = int(value)
-        total = meminfo.get("MemTotal")
-        avail = meminfo.get("MemAvailable", None)
+        for line in read_proc("/proc/meminfo").split(b"\n"):
+            # only the keys used below are parsed; "Key:   1234 kB" -> {b"Key": 1234}
+            if line.startswith(MEM_KEYS):
+                key, value = line.split(b":", 1)
+                meminfo[key] = int(value.split()[0])
+                # MemTotal and MemAvailable are the first and third lines; the rest is only
+                # needed by the fallback for kernels without MemAvailable
+                if b"MemAvailable" in meminfo and b"MemTotal" in meminfo:
+                    break
+        total = meminfo.get(b"MemTotal")
+        avail = meminfo.get(b"MemAvailable", None)
         if total is None:
             return None
         if avail is None:
-            free = meminfo.get("MemFree", 0)
-            buffers = meminfo.get("Buffers", 0)
-            cached = meminfo.get("Cached", 0)
+            free = meminfo.get(b"MemFree", 0)
+            buffers = meminfo.get(b"Buffers", 0)
+            cached = meminfo.get(b"Cached", 0)
             avail = free + buffers + cached
         used = total - avail
-        return int(round((used / total) * 100.0))
+        return (used * 100 + total // 2) // total
     except Exception:
         return None
 
+_root_cache = [float("-inf"), None]   # (monotonic time read, percent)
+
 def get_root_fs_percent():
+    # root usage moves over minutes; reuse the last statvfs for ROOT_FS_TTL seconds
+    now = time.monotonic()
+    if now - _root_cache[0] < ROOT_FS_TTL:
+        return _root_cache[1]
     try:
         du = shutil.disk_usage('/')
-        return int(round((du.used / du.total) * 100.0))
+        pct = (du.used * 100 + du.total // 2) // du.total
     except Exception:
         return None
+    _root_cache[0], _root_cache[1] = now, pct
+    return pct
+
+TEMP_PATHS = (
+    "/sys/class/thermal/thermal_zone0/temp",
+    "/sys/class/hwmon/hwmon0/temp1_input",
+)
+_temp_path = None   # the sensor file that worked last time; tried alone while it keeps working
+
+# VideoCore mailbox property call: what vcgencmd does, as one ioctl instead of a fork+exec
+VCIO_IOC_PROPERTY = 0xC0006400 | (struct.calcsize("P") << 16)   # _IOWR(100, 0, char *)
+TAG_GET_TEMPERATURE = 0x00030006
+
+def read_vcio_temp():
+    """Return the SoC temperature in millidegrees C from /dev/vcio, or None."""
+    # size, request, tag, value size, tag request, temperature id, value, end tag
+    buf = array.array("I", [32, 0, TAG_GET_TEMPERATURE, 8, 0, 0, 0, 0])
+    try:
+        with open("/dev/vcio", "rb", buffering=0) as f:
+            fcntl.ioctl(f, VCIO_IOC_PROPERTY, buf, True)
+    except OSError:
+        return None
+    return buf[6] if buf[1] == 0x80000000 else None
 
 def read_cpu_temp():
-    paths = [
-        "/sys/class/thermal/thermal_zone0/temp",
-        "/sys/class/hwmon/hwmon0/temp1_input",
-    ]
-    for p in paths:
+    global _temp_path
+    for p in ((_temp_path,) + TEMP_PATHS if _temp_path else TEMP_PATHS):
+        raw = read_proc(p, 32)
+        if not raw or not raw.strip():
+            continue
         try:
-            with open(p, "r") as f:
-                raw = f.read().strip()
-            if not raw:
-                continue
-            val = float(raw)
-            return int(round(val / 1000.0)) if val > 1000 else int(round(val))
-        except Exception:
+            val = int(raw)   # sysfs reports integer millidegrees
+        except ValueError:
             continue
-    try:
-        out = subprocess.check_output(["vcgencmd", "measure_temp"], stderr=subprocess.DEVNULL)
-        out = out.decode("utf8").strip()
-        if out.startswith("temp=") and out.endswith("'C"):
-            t = out.split("=")[1].split("'")[0]
-            return int(round(float(t)))
-    except Exception:
-        pass
-    return None
+        _temp_path = p
+        return (val + 500) // 1000 if val > 1000 else val
+    val = read_vcio_temp()
+    return None if val is None else (val + 500) // 1000
 
 def get_ip_address():
     try:
@@ -133,8 +186,10 @@ metrics_timer_ts = 0.0
 previous_ip = None
 previous_root_pct = None
 
-def bottom_window_time_driven(full_s, now_ts):
+def bottom_window_time_driven(full_s, scroll, now_ts):
     """
+    scroll is full_s + IP_GAP, built once per metrics refresh by the caller.
+    Returns (window, next_ts): the visible text and when it next changes.
     If full_s length <= COLS: return padded left-justified string.
     If longer:
       - if now_ts < metrics_timer_ts + STATIC_DISPLAY_AFTER_UPDATE:
@@ -142,27 +197,30 @@ def bottom_window_time_driven(full_s, now_ts):
       - else compute elapsed = now_ts - (metrics_timer_ts + STATIC_DISPLAY_AFTER_UPDATE)
           step = int(elapsed / IP_SCROLL_STEP)
           pos = step % total_len
-          return wrapped[pos:pos+COLS]
+          return scroll[pos:pos+COLS], wrapping to the start of scroll
     """
     if len(full_s) <= COLS:
-        return full_s.ljust(COLS)
+        return full_s.ljust(COLS), float("inf")
 
     static_until = metrics_timer_ts + STATIC_DISPLAY_AFTER_UPDATE
     if now_ts < static_until:
-        return full_s[:COLS].ljust(COLS)
+        return full_s[:COLS].ljust(COLS), static_until
 
-    scroll = full_s + IP_GAP
     total_len = len(scroll)
     elapsed = now_ts - static_until
     step = int(elapsed / IP_SCROLL_STEP)
     pos = step % total_len
-    wrapped = scroll + scroll
-    window = wrapped[pos:pos + COLS]
+    end = pos + COLS
+    # slice straight out of scroll; only a window that wraps needs a second piece
+    window = scroll[pos:end] if end <= total_len else scroll[pos:] + scroll[:end - total_len]
 
     if VERBOSE:
         print(f"DEBUG scroll: elapsed={elapsed:.2f}s step={step} pos={pos} total={total_len} -> '{window}'")
 
-    return window
+    return window, static_until + (step + 1) * IP_SCROLL_STEP
+
+# rows as last written to the LCD; only the changed span of a row is resent
+shadow = [None, None]
 
 def fmt_top_line(cpu_pct, mem_pct):
     cpu_s = "CPU:--%" if cpu_pct is None else f"CPU:{cpu_pct}%"
@@ -170,38 +228,61 @@ def fmt_top_line(cpu_pct, mem_pct):
     s = f"{cpu_s} {mem_s}"
     return s[:COLS].ljust(COLS)
 
-# ---------- main ----------
-def main():
-    global metrics_timer_ts, previous_ip, previous_root_pct
+# ---------- metrics thread ----------
+# latest readings, replaced as a whole dict by metrics_worker (one atomic assignment);
+# the LCD loop only reads it, so a slow IP probe or sensor read never stalls scrolling
+METRICS = None
+NEW_SAMPLE = threading.Event()   # set by metrics_worker after each publish; wakes the LCD loop
+
+def metrics_worker():
+    global METRICS
     prev = read_cpu_times()
     time.sleep(0.2)
+    last_ip_check = float("-inf")
+    ip = root_pct = cpu_pct = mem_pct = temp_c = None
+    while True:
+        now_ts = time.monotonic()
+        try:
+            cpu_pct_val, prev = get_cpu_percent(prev)
+            cpu_pct = cpu_pct_val if cpu_pct_val is not None else cpu_pct
 
-    try:
-        last_metrics_time = 0
-        ip = None
-        root_pct = None
-        cpu_pct = None
-        mem_pct = None
-        temp_c = None
+            mem_pct_val = get_mem_percent()
+            mem_pct = mem_pct_val if mem_pct_val is not None else mem_pct
 
-        while True:
-            now_ts = time.time()
+            root_pct_val = get_root_fs_percent()
+            root_pct = root_pct_val if root_pct_val is not None else root_pct
 
-            if now_ts - last_metrics_time >= REFRESH_INTERVAL:
-                # refresh metrics
-                cpu_pct_val, prev = get_cpu_percent(prev)
-                cpu_pct = cpu_pct_val if cpu_pct_val is not None else cpu_pct
+            temp_val = read_cpu_temp()
+            temp_c = temp_val if temp_val is not None else temp_c
 
-                mem_pct_val = get_mem_percent()
-                mem_pct = mem_pct_val if mem_pct_val is not None else mem_pct
+            if now_ts - last_ip_check >= IP_REFRESH_INTERVAL:
+                ip = get_ip_address()
+                last_ip_check = now_ts
+        except Exception as e:
+            if VERBOSE:
+                print("metrics read failed:", e)
+        METRICS = {"cpu": cpu_pct, "mem": mem_pct, "root": root_pct, "temp": temp_c, "ip": ip}
+        NEW_SAMPLE.set()
+        time.sleep(max(0.0, now_ts + REFRESH_INTERVAL - time.monotonic()))
 
-                root_pct_val = get_root_fs_percent()
-                root_pct = root_pct_val if root_pct_val is not None else root_pct
+# ---------- main ----------
+def main():
+    global metrics_timer_ts, previous_ip, previous_root_pct
+    threading.Thread(target=metrics_worker, name="metrics", daemon=True).start()
 
-                temp_val = read_cpu_temp()
-                temp_c = temp_val if temp_val is not None else temp_c
+    try:
+        NEW_SAMPLE.wait()
+        seen = None
 
-                ip = get_ip_address()
+        while True:
+            now_ts = time.monotonic()
+
+            NEW_SAMPLE.clear()
+            m = METRICS
+            if m is not seen:
+                # a fresh sample from the metrics thread
+                seen = m
+                ip, root_pct, temp_c = m["ip"], m["root"], m["temp"]
 
                 # Decide whether to reset the static/scroll timer.
                 # Reset only if IP changed OR Root% changed.
@@ -220,29 +301,30 @@ def main():
                         previous_ip = ip
                         previous_root_pct = root_pct
                         if VERBOSE:
-                            print(f"BOTTOM SIGNIFICANT CHANGE at {time.strftime('%H:%M:%S', time.localtime(now_ts))}: ip_changed={ip_changed} root_changed={root_changed}")
+                            print(f"BOTTOM SIGNIFICANT CHANGE at {time.strftime('%H:%M:%S')}: ip_changed={ip_changed} root_changed={root_changed}")
 
-                last_metrics_time = now_ts
+                # the row strings only change here, so build them once per sample
+                top = fmt_top_line(m["cpu"], m["mem"])
+                full_bottom = build_bottom_string(ip, root_pct, temp_c)
+                bottom_scroll = full_bottom + IP_GAP
 
-            top = fmt_top_line(cpu_pct, mem_pct)
-            full_bottom = build_bottom_string(ip, root_pct, temp_c)
-            bottom = bottom_window_time_driven(full_bottom, now_ts)
+            bottom, next_ts = bottom_window_time_driven(full_bottom, bottom_scroll, now_ts)
 
             # write both lines to LCD
             try:
-                lcd.cursor_pos = (0, 0); lcd.write_string(top)
-                lcd.cursor_pos = (1, 0); lcd.write_string(bottom)
+                flush_frame(bus, LCD_ADDR, top, bottom, shadow)
             except Exception as e:
                 # try to re-init write if odd happens
+                shadow[0] = shadow[1] = None
                 try:
                     lcd.clear()
-                    lcd.cursor_pos = (0, 0); lcd.write_string(top)
-                    lcd.cursor_pos = (1, 0); lcd.write_string(bottom)
+                    flush_frame(bus, LCD_ADDR, top, bottom, shadow)
                 except Exception:
                     if VERBOSE:
                         print("LCD write failed:", e)
 
-            time.sleep(LOOP_SLEEP)
+            # sleep until the bottom row's next scroll step or a new sample, whichever is first
+            NEW_SAMPLE.wait(max(0.0, min(next_ts, now_ts + REFRESH_INTERVAL) - time.monotonic()))
 
     except KeyboardInterrupt:
         lcd.clear()
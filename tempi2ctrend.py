@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
 # DHT11 -> 16x2 I2C LCD with custom arrow glyphs for trend (↑/↓/→)
-import time, collections, logging
+import os, glob, time, collections, logging
 from RPLCD.i2c import CharLCD
-import Adafruit_DHT
+try:
+    import Adafruit_DHT   # userspace bit-banging; only used when the kernel driver is absent
+except ImportError:
+    Adafruit_DHT = None
 
 # ---------- CONFIG ----------
 LCD_DRIVER='PCF8574'; LCD_ADDR=0x27; I2C_PORT=1; COLS=16
-SENSOR = Adafruit_DHT.DHT11
 GPIO_PIN = 4
+# kernel dht11 driver (dtoverlay=dht11,gpiopin=4 in /boot/config.txt) exposes the sensor over IIO
+IIO_DEVICES = "/sys/bus/iio/devices/iio:device*"
 SAMPLE_INTERVAL = 3.0        # seconds between sensor reads
 SMOOTH_SAMPLES = 4           # rolling average window for display
 TREND_WINDOW = 3             # number of displayed averages to compare
@@ -66,14 +70,56 @@ ARROW_UP   = '\x00' if CUSTOM_OK else '^'
 ARROW_DOWN = '\x01' if CUSTOM_OK else 'v'
 ARROW_STEADY = '\x02' if CUSTOM_OK else '-'
 
+# ---------- sensor ----------
+def find_iio_dht():
+    """Return the IIO directory of the kernel DHT driver, or None."""
+    for d in sorted(glob.glob(IIO_DEVICES)):
+        try:
+            with open(os.path.join(d, "name")) as f:
+                if f.read().startswith("dht11"):
+                    return d
+        except OSError:
+            pass
+    return None
+
+IIO_DIR = find_iio_dht()
+if IIO_DIR is None and Adafruit_DHT is None:
+    raise SystemExit("No DHT11 IIO device and Adafruit_DHT not installed")
+
+def read_iio(name):
+    with open(os.path.join(IIO_DIR, name), "rb") as f:
+        return int(f.read()) / 1000.0
+
+def read_sensor():
+    """Return (humidity %, temperature C), either None on a failed read."""
+    if IIO_DIR is None:
+        return Adafruit_DHT.read_retry(Adafruit_DHT.DHT11, GPIO_PIN)
+    # the driver times the pulses from GPIO interrupts; a bad checksum or timeout is EIO
+    try:
+        return read_iio("in_humidityrelative_input"), read_iio("in_temp_input")
+    except (OSError, ValueError):
+        return None, None
+
 # ---------- buffers ----------
-tbuf = collections.deque(maxlen=SMOOTH_SAMPLES)
-hbuf = collections.deque(maxlen=SMOOTH_SAMPLES)
+class RollingMean:
+    """Bounded sample window with a running total, so the mean needs no rescan.
+    Wraps the deque rather than subclassing it: add() is the only way in, so total can't drift."""
+    def __init__(self, n):
+        self._buf = collections.deque(maxlen=n)
+        self.total = 0.0
+    def add(self, x):
+        if len(self._buf) == self._buf.maxlen:
+            self.total -= self._buf[0]   # the oldest sample is about to be evicted
+        self._buf.append(x)
+        self.total += x
+    def mean(self):
+        return self.total/len(self._buf) if self._buf else None
+
+tbuf = RollingMean(SMOOTH_SAMPLES)
+hbuf = RollingMean(SMOOTH_SAMPLES)
 avg_hist = collections.deque(maxlen=TREND_WINDOW)
 last_success = False
 
-def ravg(buf): return sum(buf)/len(buf) if buf else None
-
 def compute_trend():
     if len(avg_hist) < 2:
         return ARROW_STEADY
@@ -114,12 +160,12 @@ try:
     next_sample = 0.0
     next_refresh = 0.0
     while True:
-        now = time.time()
+        now = time.monotonic()
 
         if now >= next_sample:
-            h,t = Adafruit_DHT.read_retry(SENSOR, GPIO_PIN)
+            h,t = read_sensor()
             if t is not None and h is not None:
-                tbuf.append(float(t)); hbuf.append(float(h))
+                tbuf.add(float(t)); hbuf.add(float(h))
                 last_success = True
                 logging.info("OK T=%.1fC H=%.1f%%", t, h)
             else:
@@ -128,8 +174,8 @@ try:
             next_sample = now + SAMPLE_INTERVAL
 
         if now >= next_refresh:
-            tavg = ravg(tbuf)
-            havg = ravg(hbuf)
+            tavg = tbuf.mean()
+            havg = hbuf.mean()
             if tavg is not None:
                 avg_hist.append(tavg)
             trend = compute_trend()
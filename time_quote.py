@@ -8,6 +8,8 @@ import time
 import random
 from datetime import datetime
 from RPLCD.i2c import CharLCD
+from smbus2 import SMBus
+from i2c_common import flush_frame
 
 # ---------- CONFIG ----------
 LCD_DRIVER = 'PCF8574'
@@ -67,29 +69,31 @@ QUOTES = [
 # ---------- LCD init ----------
 lcd = CharLCD(LCD_DRIVER, LCD_ADDR, port=1, cols=COLS, rows=ROWS)
 lcd.backlight_enabled = True
+bus = SMBus(1)
 
 def center_text(s, width):
     s = s[:width]
     return s.center(width)
 
-def left_window(s, start, width):
-    # return window of width chars from s starting at start (wrap-around)
-    if len(s) <= width:
-        return s.ljust(width)
-    # create padded scroll string with a gap
-    scroll = s + "   "
-    wrapped = scroll + scroll  # duplicate so we can slice without modulo each time
-    return wrapped[start:start+width]
-
-def choose_quote(prev_quote=None):
-    q = random.choice(QUOTES)
-    # avoid repeating same quote twice in a row when possible
-    if prev_quote and len(QUOTES) > 1:
+QUOTE_GAP = "   "   # blank cells between repeats of a scrolling quote
+
+def build_windows(quote):
+    """Every COLS-wide bottom row the quote shows: one centered row if short, each scroll step if long."""
+    if len(quote) <= COLS:
+        return [center_text(quote, COLS)]
+    scroll = quote + QUOTE_GAP
+    wrapped = scroll + scroll[:COLS - 1]
+    return [wrapped[i:i+COLS] for i in range(len(scroll))]
+
+def choose_quote(prev_idx=None):
+    """Return the index of a random quote, avoiding prev_idx when possible."""
+    i = random.randrange(len(QUOTES))
+    if prev_idx is not None and len(QUOTES) > 1:
         tries = 0
-        while q == prev_quote and tries < 6:
-            q = random.choice(QUOTES)
+        while i == prev_idx and tries < 6:
+            i = random.randrange(len(QUOTES))
             tries += 1
-    return q
+    return i
 
 def compute_display_duration(quote):
     """
@@ -101,55 +105,57 @@ def compute_display_duration(quote):
     """
     if len(quote) <= COLS:
         return QUOTE_INTERVAL
-    total_scroll_len = len(quote) + 3  # quote + gap
+    total_scroll_len = len(quote) + len(QUOTE_GAP)
     duration = total_scroll_len * SCROLL_STEP_DELAY + POST_SCROLL_PAUSE
     return max(duration, QUOTE_INTERVAL)
 
+# QUOTES never change, so every row each quote can show and its display time are built once here
+QUOTE_WINDOWS = [build_windows(q) for q in QUOTES]
+QUOTE_DURATIONS = [compute_display_duration(q) for q in QUOTES]
+
 def main():
-    current_quote = choose_quote()
+    quote_idx = choose_quote()
+    windows = QUOTE_WINDOWS[quote_idx]
     quote_selected_time = time.monotonic()
-    quote_display_duration = compute_display_duration(current_quote)
+    quote_display_duration = QUOTE_DURATIONS[quote_idx]
     scroll_index = 0
     last_time_sec = -1
-    scroll_required = len(current_quote) > COLS
     scroll_last_step = time.monotonic()
+    top = ""
+    lcd_rows = [None, None]   # rows as last written to the LCD
 
     try:
         while True:
+            # one clock read each per tick: every comparison below sees the same instant
             now = datetime.now()
+            mono = time.monotonic()
             # Update top row (date + time) once per second
             if now.second != last_time_sec:
                 dt_str = now.strftime("%d-%b %H:%M:%S")  # e.g. "02-Oct 17:45:12"
-                lcd.cursor_pos = (0, 0)
-                lcd.write_string(dt_str.ljust(COLS)[:COLS])
+                top = dt_str.ljust(COLS)[:COLS]
                 last_time_sec = now.second
 
-            # Draw bottom row: center if short, scroll if long
-            if not scroll_required:
-                lcd.cursor_pos = (1, 0)
-                lcd.write_string(center_text(current_quote, COLS))
-            else:
-                # Only advance scroll_index each SCROLL_STEP_DELAY seconds
-                if time.monotonic() - scroll_last_step >= SCROLL_STEP_DELAY:
-                    scroll_index += 1
-                    scroll_last_step = time.monotonic()
-                window = left_window(current_quote, scroll_index, COLS)
-                lcd.cursor_pos = (1, 0)
-                lcd.write_string(window)
-                # wrap scroll index to prevent it growing unbounded
-                total_scroll_len = len(current_quote) + 3  # quote + gap
-                if scroll_index >= total_scroll_len:
-                    scroll_index = 0
+            # Bottom row: a short quote has one (centered) window, a long one scrolls
+            # Only advance scroll_index each SCROLL_STEP_DELAY seconds, wrapping at the end
+            if len(windows) > 1 and mono - scroll_last_step >= SCROLL_STEP_DELAY:
+                scroll_index = (scroll_index + 1) % len(windows)
+                scroll_last_step = mono
+            bottom = windows[scroll_index]
+
+            # both rows go out as one I2C write, and only the cells that changed
+            try:
+                flush_frame(bus, LCD_ADDR, top, bottom, lcd_rows)
+            except Exception:
+                lcd_rows[:] = [None, None]
 
             # If current quote has been displayed long enough, pick a new one
-            if time.monotonic() - quote_selected_time >= quote_display_duration:
-                prev = current_quote
-                current_quote = choose_quote(prev)
-                quote_selected_time = time.monotonic()
+            if mono - quote_selected_time >= quote_display_duration:
+                quote_idx = choose_quote(quote_idx)
+                windows = QUOTE_WINDOWS[quote_idx]
+                quote_selected_time = mono
                 scroll_index = 0
-                scroll_required = len(current_quote) > COLS
-                scroll_last_step = time.monotonic()
-                quote_display_duration = compute_display_duration(current_quote)
+                scroll_last_step = mono
+                quote_display_duration = QUOTE_DURATIONS[quote_idx]
 
             time.sleep(LOOP_SLEEP)
 
@@ -3,22 +3,29 @@
 # Word of the day: top shows WORD, bottom scrolls the definition.
 # Uses Wordnik if WORDNIK_KEY env is set; otherwise uses a small builtin list + dictionaryapi.dev.
 
-import os, time, random, requests
+import os, time, random
 from RPLCD.i2c import CharLCD
+from smbus2 import SMBus
+from i2c_common import flush_frame, build_windows, scroll_window, http_session, json_loads
 
 LCD_DRIVER='PCF8574'; LCD_ADDR=0x27; I2C_PORT=1; COLS=16
 UPDATE_INTERVAL=6*60*60   # refresh every 6 hours by default when used alone
 STATIC_DISPLAY=2.0
 SCROLL_STEP=0.2
 SCROLL_GAP="    "
+TIMEOUT=(3, 8)            # (connect, read) seconds
 
 lcd = CharLCD(LCD_DRIVER, LCD_ADDR, port=I2C_PORT, cols=COLS, rows=2)
 lcd.backlight_enabled = True
+bus = SMBus(I2C_PORT)
 
 WORDNIK_KEY = os.environ.get("WORDNIK_KEY")
 WORDNIK_RANDOM = "https://api.wordnik.com/v4/words.json/randomWord"
 DICTAPI = "https://api.dictionaryapi.dev/api/v2/entries/en/{}"
 
+# keep-alive session: the word and definition requests reuse one connection per host (no retries)
+SESSION = http_session(retries=0, pool=(2, 4))
+
 # small fallback word list (useful if no external API)
 FALLBACK_WORDS = [
     "serendipity","ephemeral","quixotic","luminous","mellifluous",
@@ -29,15 +36,15 @@ def fetch_word_and_definition():
     word = None; definition = None
     if WORDNIK_KEY:
         try:
-            r = requests.get(WORDNIK_RANDOM, params={"api_key":WORDNIK_KEY}, timeout=8)
+            r = SESSION.get(WORDNIK_RANDOM, params={"api_key":WORDNIK_KEY}, timeout=TIMEOUT)
             r.raise_for_status()
-            word = r.json().get("word")
+            word = json_loads(r.content).get("word")
             if word:
                 # fetch definitions
-                defr = requests.get(f"https://api.wordnik.com/v4/word.json/{word}/definitions",
-                                    params={"limit":1,"api_key":WORDNIK_KEY}, timeout=8)
+                defr = SESSION.get(f"https://api.wordnik.com/v4/word.json/{word}/definitions",
+                                   params={"limit":1,"api_key":WORDNIK_KEY}, timeout=TIMEOUT)
                 defr.raise_for_status()
-                defs = defr.json()
+                defs = json_loads(defr.content)
                 if defs:
                     definition = defs[0].get("text")
         except Exception:
@@ -47,9 +54,9 @@ def fetch_word_and_definition():
         # fallback: choose from list and try dictionaryapi.dev for definition
         word = random.choice(FALLBACK_WORDS)
         try:
-            r = requests.get(DICTAPI.format(word), timeout=8)
+            r = SESSION.get(DICTAPI.format(word), timeout=TIMEOUT)
             r.raise_for_status()
-            jr = r.json()
+            jr = json_loads(r.content)
             # dictionaryapi.dev returns a list — find first definition text
             if isinstance(jr, list) and jr:
                 meanings = jr[0].get("meanings", [])
@@ -62,49 +69,34 @@ def fetch_word_and_definition():
 
     return word, definition or "Definition not available."
 
-def scroll_window(full_s, base_time, now_ts):
-    if not full_s:
-        return "".ljust(COLS)
-    if len(full_s) <= COLS:
-        return full_s.ljust(COLS)
-    static_until = base_time + STATIC_DISPLAY
-    if now_ts < static_until:
-        return full_s[:COLS].ljust(COLS)
-    scroll = full_s + SCROLL_GAP; total = len(scroll)
-    elapsed = now_ts - static_until
-    step = int(elapsed / SCROLL_STEP)
-    pos = step % total
-    wrapped = scroll + scroll
-    return wrapped[pos:pos+COLS]
-
 def main():
-    last_fetch = 0
-    word, definition = None, None
+    last_fetch = float("-inf")
+    word, windows = None, None
     base_time = 0
+    lcd_rows = [None, None]   # rows as last written to the LCD
     try:
         while True:
-            now = time.time()
+            now = time.monotonic()
             if now - last_fetch >= UPDATE_INTERVAL or word is None:
                 w,d = fetch_word_and_definition()
                 if w:
                     word, definition = w, (d or "No definition.")
-                    base_time = now
                 else:
                     word, definition = "word", "No definition available."
-                    base_time = now
-                last_fetch = now
+                windows = build_windows(definition, COLS, SCROLL_GAP)   # cut once per word
+                base_time = last_fetch = now
 
             top = (word.upper()[:COLS]).center(COLS)
-            bottom = scroll_window(definition, base_time, time.time())
+            bottom, _ = scroll_window(windows, base_time, now, STATIC_DISPLAY, SCROLL_STEP)
 
+            # both rows go out as one I2C write, and only the cells that changed
             try:
-                lcd.cursor_pos=(0,0); lcd.write_string(top)
-                lcd.cursor_pos=(1,0); lcd.write_string(bottom)
+                flush_frame(bus, LCD_ADDR, top, bottom, lcd_rows)
             except Exception:
+                lcd_rows[:] = [None, None]
                 try:
                     lcd.clear()
-                    lcd.cursor_pos=(0,0); lcd.write_string(top)
-                    lcd.cursor_pos=(1,0); lcd.write_string(bottom)
+                    flush_frame(bus, LCD_ADDR, top, bottom, lcd_rows)
                 except Exception:
                     pass
 
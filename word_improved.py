@@ -10,9 +10,12 @@ Word-of-the-Day for 16x2 I2C LCD
 ✓ Caches last word and rotates fallback list
 """
 
-import os, time, random, requests, json
+import os, time, random, json, threading, queue, struct, atexit
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from RPLCD.i2c import CharLCD
+from i2c_common import (write_rows, build_windows, scroll_window, http_session,
+                        json_loads)
 
 # LCD config
 LCD_DRIVER = 'PCF8574'
@@ -25,14 +28,20 @@ UPDATE_INTERVAL = 30
 STATIC_DISPLAY = 2.0
 SCROLL_STEP = 0.15
 SCROLL_GAP = "    "
+TIMEOUT = (4, 8)       # (connect, read) seconds for every API call
 
 # Files
 LAST_WORD_FILE = "/tmp/i2c_word_last.txt"
-WORD_INDEX_FILE = "/tmp/i2c_word_index.txt"
+WORD_ORDER_FILE = "/tmp/i2c_word_order.bin"
+WORD_POS_FILE = "/tmp/i2c_word_pos.bin"
 LOG_FILE = "/tmp/i2c_word_improved.log"
+DEF_CACHE_FILE = "/tmp/i2c_def_cache.json"
+DEF_CACHE_TTL = 30 * 24 * 3600   # seconds a cached definition is trusted
+DEF_MISS_TTL = 24 * 3600         # seconds a word with no definition is left alone before asking again
+PREFETCH_DELAY = 1.0             # seconds between start-up warm-up lookups
 
 # --- HUGE 200+ fallback list ---
-FALLBACK_WORDS = [
+FALLBACK_WORDS = (
     "aberration","absolution","abundance","accolade","acumen","adroit","aesthetic","affinity","agility","alchemy",
     "altruism","ambience","ambivalence","ameliorate","amiable","amorphous","anomaly","antithesis","aplomb","arcane",
     "ardent","articulate","ascendancy","aspiration","assiduous","audacity","austerity","benevolent","benign","bliss",
@@ -58,7 +67,10 @@ FALLBACK_WORDS = [
     "ubiquitous","umbrage","undulate","unfathomable","utopia","valiant","vehement","venerable","veracity","verdant",
     "verve","vigilant","vindicate","virtuoso","vociferous","volition","whimsical","winsome","wistful","zenith","zephyr",
     "zealous","zeitgeist"
-]
+)
+
+N_WORDS = len(FALLBACK_WORDS)
+FALLBACK_SET = frozenset(FALLBACK_WORDS)
 
 # APIs
 WORDNIK_KEY = os.environ.get("WORDNIK_KEY", "").strip()
@@ -67,16 +79,48 @@ WORDNIK_DEF = "https://api.wordnik.com/v4/word.json/{}/definitions"
 RANDOM_WORD_API = "https://random-word-api.herokuapp.com/word?number=1"
 DICTAPI = "https://api.dictionaryapi.dev/api/v2/entries/en/{}"
 
+HEADERS = {"User-Agent": "i2c-word/1.0", "Accept": "application/json"}
+RETRY_STATUS = (502, 503, 504)
+
+# keep-alive session; failed connects/reads and 502/503/504 replies are retried twice, quickly
+SESSION = http_session(retries=2, backoff=0.3, status=RETRY_STATUS, headers=HEADERS)
+
+# With httpx and its HTTP/2 extra installed, one multiplexed connection per host carries the
+# concurrent lookups (Wordnik word and definition share api.wordnik.com); otherwise SESSION.
+try:
+    import httpx, h2  # noqa: F401  (h2 is needed for http2=True)
+    # follows redirects like requests does; the transport's retries cover failed connects only,
+    # so get_json retries RETRY_STATUS replies itself
+    HTTP = httpx.Client(headers=HEADERS, timeout=httpx.Timeout(TIMEOUT[1], connect=TIMEOUT[0]),
+                        follow_redirects=True,
+                        transport=httpx.HTTPTransport(http2=True, retries=2,
+                                                      limits=httpx.Limits(max_connections=8,
+                                                                          max_keepalive_connections=4)))
+    HTTP_KW = {}   # timeout is set on the client
+    STATUS_RETRIES = 2
+except ImportError:
+    HTTP = SESSION
+    HTTP_KW = {"timeout": TIMEOUT}
+    STATUS_RETRIES = 0   # urllib3 already retries RETRY_STATUS on SESSION
+
+# word and definition lookups run side by side on these threads
+_EXEC = ThreadPoolExecutor(max_workers=4)
+
 # LCD init
 lcd = CharLCD(LCD_DRIVER, LCD_ADDR, port=I2C_PORT, cols=COLS, rows=2)
 lcd.backlight_enabled = True
 
 # Helper functions
+# opened once, line-buffered: each message is one write() instead of open/write/close
+try:
+    _LOG_FH = open(LOG_FILE, "a", buffering=1)
+    atexit.register(_LOG_FH.close)
+except OSError:
+    _LOG_FH = None
+
 def log(msg):
-    ts = datetime.now().strftime("%H:%M:%S")
     try:
-        with open(LOG_FILE, "a") as f:
-            f.write(f"[{ts}] {msg}\n")
+        _LOG_FH.write(f"[{datetime.now():%H:%M:%S}] {msg}\n")
     except Exception:
         pass
 
@@ -94,48 +138,144 @@ def write_last_word(word):
     except Exception:
         pass
 
+# Fallback rotation: the shuffled order is written only when it is reshuffled, and the
+# position into it is a 4-byte counter rewritten in place, so advancing costs one pwrite.
+# Both files are little-endian: the order is a 2-byte word index per word, the position a 4-byte count.
+_order, _idx = None, 0
+ORDER_FMT = f"<{N_WORDS}H"
+
+def shuffled_order():
+    order = list(range(N_WORDS))
+    random.shuffle(order)
+    return order
+
 def read_word_index():
     try:
-        with open(WORD_INDEX_FILE) as f:
-            lines = f.read().splitlines()
-            order = lines[0].split(",")
-            idx = int(lines[1])
-            if set(order) != set(FALLBACK_WORDS):
-                raise ValueError
-            return order, idx
-    except Exception:
-        order = FALLBACK_WORDS[:]
-        random.shuffle(order)
-        idx = 0
-        write_word_index(order, idx)
+        with open(WORD_ORDER_FILE, "rb") as f:
+            order = list(struct.unpack(ORDER_FMT, f.read()))
+        if sorted(order) != list(range(N_WORDS)):
+            raise ValueError
+        with open(WORD_POS_FILE, "rb") as f:
+            idx = struct.unpack("<I", f.read(4))[0]
         return order, idx
+    except Exception:
+        order = shuffled_order()
+        write_word_order(order)
+        return order, 0
 
-def write_word_index(order, idx):
+def write_word_order(order):
     try:
-        with open(WORD_INDEX_FILE, "w") as f:
-            f.write(",".join(order) + "\n" + str(idx))
+        with open(WORD_ORDER_FILE, "wb") as f:
+            f.write(struct.pack(ORDER_FMT, *order))
     except Exception:
         pass
+    write_word_pos(0)
+
+def write_word_pos(idx):
+    try:
+        fd = os.open(WORD_POS_FILE, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            os.pwrite(fd, struct.pack("<I", idx), 0)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
 
 def get_next_fallback_word():
-    order, idx = read_word_index()
-    if idx >= len(order):
-        order = FALLBACK_WORDS[:]
-        random.shuffle(order)
-        idx = 0
-    w = order[idx]
-    idx += 1
-    write_word_index(order, idx)
+    global _order, _idx
+    if _order is None:
+        _order, _idx = read_word_index()
+    if _idx >= len(_order):
+        _order = shuffled_order()
+        write_word_order(_order)
+        _idx = 0
+    w = FALLBACK_WORDS[_order[_idx]]
+    _idx += 1
+    write_word_pos(_idx)
     return w
 
+# Definition cache: {word: {"def": str or None, "ts": epoch}}, loaded once and kept in memory;
+# "def": None records a miss, so a word without a definition isn't looked up on every start.
+# Only fallback-list words are cached: that list repeats, so after one pass its definitions need
+# no HTTP at all, while random API words rarely come back and would only grow the file.
+def load_def_cache():
+    """Read the cache file, dropping expired entries and any word not on the fallback list."""
+    try:
+        with open(DEF_CACHE_FILE, "rb") as f:
+            c = json_loads(f.read())
+    except Exception:
+        return {}
+    if not isinstance(c, dict):
+        return {}
+    now = time.time()
+    return {k: v for k, v in c.items() if k in FALLBACK_SET and isinstance(v, dict) and fresh(v, now)}
+
+def fresh(entry, now):
+    """True while a cache entry is still trusted: definitions for DEF_CACHE_TTL, misses for DEF_MISS_TTL."""
+    return now - entry.get("ts", 0) < (DEF_CACHE_TTL if entry.get("def") else DEF_MISS_TTL)
+
+_def_cache = load_def_cache()
+_def_lock = threading.Lock()   # fetchers run on several threads
+_save_lock = threading.Lock()  # the prefetch thread and choose_word both save
+_def_dirty = True   # first save rewrites the file, so whatever load_def_cache dropped leaves the disk too
+
+def save_def_cache():
+    """Rewrite the cache file atomically if anything was added since the last save."""
+    global _def_dirty
+    with _save_lock:
+        with _def_lock:
+            if not _def_dirty:
+                return
+            data = json.dumps(_def_cache)
+            _def_dirty = False
+        try:
+            tmp = DEF_CACHE_FILE + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(data)
+            os.replace(tmp, DEF_CACHE_FILE)
+        except Exception as e:
+            log(f"Def cache save fail: {e}")
+
+def disk_cached(fetch):
+    """Serve fetch(word) for fallback-list words from the definition cache, storing fresh results
+    (and misses) in it. fetch returns None for a word with no definition and raises on network
+    trouble; only the former is cached, so a boot before the network is up records nothing."""
+    def cached(word):
+        global _def_dirty
+        key = word.lower()
+        if key in FALLBACK_SET:
+            with _def_lock:
+                hit = _def_cache.get(key)
+            if hit and fresh(hit, time.time()):
+                return hit.get("def")
+        try:
+            d = fetch(word)
+        except Exception as e:
+            log(f"Def lookup fail for {word}: {e}")
+            return None
+        if key not in FALLBACK_SET:
+            return d
+        with _def_lock:
+            _def_cache[key] = {"def": d or None, "ts": time.time()}
+            _def_dirty = True
+        return d
+    return cached
+
 # API fetchers
+def get_json(url, params=None):
+    for attempt in range(STATUS_RETRIES + 1):
+        r = HTTP.get(url, params=params, **HTTP_KW)
+        if r.status_code not in RETRY_STATUS or attempt == STATUS_RETRIES:
+            break
+        time.sleep(0.3 * 2 ** attempt)   # same 0.3 s backoff factor as SESSION's Retry
+    r.raise_for_status()
+    return json_loads(r.content)
+
 def fetch_wordnik_word():
     if not WORDNIK_KEY:
         return None
     try:
-        r = requests.get(WORDNIK_RANDOM, params={"api_key": WORDNIK_KEY}, timeout=8)
-        r.raise_for_status()
-        j = r.json()
+        j = get_json(WORDNIK_RANDOM, {"api_key": WORDNIK_KEY})
         return j.get("word")
     except Exception as e:
         log(f"Wordnik fail: {e}")
@@ -145,9 +285,7 @@ def fetch_wordnik_def(word):
     if not WORDNIK_KEY:
         return None
     try:
-        r = requests.get(WORDNIK_DEF.format(word), params={"limit": 1, "api_key": WORDNIK_KEY}, timeout=8)
-        r.raise_for_status()
-        j = r.json()
+        j = get_json(WORDNIK_DEF.format(word), {"limit": 1, "api_key": WORDNIK_KEY})
         if isinstance(j, list) and j:
             return j[0].get("text")
     except Exception as e:
@@ -156,96 +294,136 @@ def fetch_wordnik_def(word):
 
 def fetch_random_word():
     try:
-        r = requests.get(RANDOM_WORD_API, timeout=6)
-        r.raise_for_status()
-        j = r.json()
+        j = get_json(RANDOM_WORD_API)
         if isinstance(j, list) and j:
             return j[0]
     except Exception as e:
         log(f"RandomWord fail: {e}")
     return None
 
+@disk_cached
 def fetch_dictionary_def(word):
     try:
-        r = requests.get(DICTAPI.format(word), timeout=8)
-        r.raise_for_status()
-        j = r.json()
-        if isinstance(j, list) and j:
-            meanings = j[0].get("meanings", [])
-            if meanings:
-                defs = meanings[0].get("definitions", [])
-                if defs:
-                    return defs[0].get("definition")
-    except Exception:
-        pass
+        j = get_json(DICTAPI.format(word))
+    except Exception as e:
+        # requests and httpx status errors both carry the response
+        if getattr(getattr(e, "response", None), "status_code", None) == 404:
+            return None   # dictionaryapi.dev has no entry for this word
+        raise
+    if isinstance(j, list) and j:
+        meanings = j[0].get("meanings", [])
+        if meanings:
+            defs = meanings[0].get("definitions", [])
+            if defs:
+                return defs[0].get("definition")
+    return None
+
+def prefetch_fallback_defs(words):
+    """Look up every uncached fallback definition one at a time, PREFETCH_DELAY apart, so the
+    warm-up never bursts at dictionaryapi.dev; the cache is saved every 25 lookups and at the end."""
+    with _def_lock:
+        missing = [w for w in words if w.lower() not in _def_cache]
+    if not missing:
+        return
+    found = 0
+    for i, w in enumerate(missing, 1):
+        found += bool(fetch_dictionary_def(w))
+        if i % 25 == 0:
+            save_def_cache()
+        time.sleep(PREFETCH_DELAY)
+    save_def_cache()
+    log(f"Prefetched {found}/{len(missing)} fallback definitions")
+
+def first_result(futures):
+    """Return the first truthy result of `futures` in completion order, or None."""
+    for fut in as_completed(futures):
+        r = fut.result()
+        if r:
+            return r
     return None
 
 def choose_word():
-    last = read_last_word()
-    # Wordnik
+    last = (read_last_word() or "").lower()
+    # race the word APIs and take whichever answers first with a new word;
+    # its definition lookups (Wordnik's own and dictionaryapi.dev) race the same way
+    sources = {_EXEC.submit(fetch_random_word): "RandomWord"}
     if WORDNIK_KEY:
-        w = fetch_wordnik_word()
-        if w and w.lower() != (last or "").lower():
-            d = fetch_wordnik_def(w) or fetch_dictionary_def(w)
-            if d:
-                log(f"Using Wordnik {w}")
-                return w, d
-    # Random Word API
-    w = fetch_random_word()
-    if w and w.lower() != (last or "").lower():
-        d = fetch_dictionary_def(w)
+        sources[_EXEC.submit(fetch_wordnik_word)] = "Wordnik"
+    failed = []
+    for fut in as_completed(sources):
+        src, w = sources[fut], fut.result()
+        if not w or w.lower() == last:
+            failed.append(f"{src}:{'none' if not w else 'repeat'}")
+            continue
+        defs = [_EXEC.submit(fetch_dictionary_def, w)]
+        if src == "Wordnik":
+            defs.insert(0, _EXEC.submit(fetch_wordnik_def, w))
+        d = first_result(defs)
         if d:
-            log(f"Using RandomWord {w}")
+            log(f"Using {src} {w}")
+            save_def_cache()
             return w, d
+        failed.append(f"{src}:nodef")
     # fallback
     w = get_next_fallback_word()
-    if w.lower() == (last or "").lower():
+    if w.lower() == last:
         w = get_next_fallback_word()
     d = fetch_dictionary_def(w) or "Definition not available."
-    log(f"Fallback {w}")
+    log(f"Fallback {w} ({', '.join(failed)})")
+    save_def_cache()   # at most one cache write per word change
     return w, d
 
-# Scroll helper
-def scroll_window(full, base, now):
-    if not full:
-        return "".ljust(COLS)
-    if len(full) <= COLS:
-        return full.ljust(COLS)
-    static_until = base + STATIC_DISPLAY
-    if now < static_until:
-        return full[:COLS].ljust(COLS)
-    scroll = full + SCROLL_GAP
-    total = len(scroll)
-    elapsed = now - static_until
-    step = int(elapsed / SCROLL_STEP)
-    pos = step % total
-    return (scroll + scroll)[pos:pos + COLS]
+# Background fetch: the LCD loop asks for the next word via _fetch_evt and picks it up
+# from _word_q without blocking, so a slow or failing API never stops the scrolling
+_word_q = queue.Queue(maxsize=1)
+_fetch_evt = threading.Event()
+
+def _fetch_worker():
+    while True:
+        _fetch_evt.wait()
+        _fetch_evt.clear()
+        try:
+            _word_q.put(choose_word(), timeout=1)
+        except queue.Full:
+            pass
+        except Exception as e:
+            log(f"Fetch worker: {e}")
+
+def prepare_word(w, d):
+    """Record w as the last word shown and return its finished top row and definition windows."""
+    write_last_word(w)
+    text = d if len(d) < 800 else d[:800] + "..."
+    top = w.upper().center(COLS)[:COLS].ljust(COLS)
+    return top, build_windows(text, COLS, SCROLL_GAP)
+
+# rows as last written to the LCD; only the changed span of a row is resent
+shadow = [None, None]
 
 # Main
 def main():
-    last_fetch = 0
-    header, text = "WORD", "loading..."
-    base_time = 0.0
+    threading.Thread(target=_fetch_worker, name="fetch", daemon=True).start()
+    threading.Thread(target=prefetch_fallback_defs, args=(FALLBACK_WORDS,),
+                     name="prefetch", daemon=True).start()
     try:
+        # the first word is fetched inline so the first frame has content
+        top, windows = prepare_word(*choose_word())
+        base_time = last_fetch = time.monotonic()
         while True:
-            now = time.time()
-            if now - last_fetch >= UPDATE_INTERVAL or text == "loading...":
-                w, d = choose_word()
-                write_last_word(w)
-                header = w.upper().center(COLS)
-                text = d if len(d) < 800 else d[:800] + "..."
-                base_time = now
+            now = time.monotonic()
+            if now - last_fetch >= UPDATE_INTERVAL:
+                _fetch_evt.set()
                 last_fetch = now
-            top = header[:COLS].ljust(COLS)
-            bottom = scroll_window(text, base_time, time.time())
+            bottom, next_ts = scroll_window(windows, base_time, now, STATIC_DISPLAY, SCROLL_STEP)
+            write_rows(lcd, ((0, top), (1, bottom)), shadow)
+            # sleep until the next scroll step or fetch request; a fetched word wakes us at once
+            deadline = min(next_ts, last_fetch + UPDATE_INTERVAL)
             try:
-                lcd.cursor_pos = (0,0); lcd.write_string(top)
-                lcd.cursor_pos = (1,0); lcd.write_string(bottom)
-            except Exception:
-                lcd.clear()
-                lcd.cursor_pos = (0,0); lcd.write_string(top)
-                lcd.cursor_pos = (1,0); lcd.write_string(bottom)
-            time.sleep(0.12)
+                w, d = _word_q.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                pass
+            else:
+                top, windows = prepare_word(w, d)
+                base_time = time.monotonic()
     except KeyboardInterrupt:
         lcd.clear()
         lcd.write_string("Stopped".ljust(COLS))